@@ -0,0 +1,154 @@
+import asyncio
+import threading
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import JsonResponse
+
+from .scheduling import acquire_in_thread
+
+# Graph clients tag each request with a session id and a frame number that only
+# increases. Headers rather than body fields, so a frame is registered on arrival,
+# before its (large) body is parsed.
+FRAME_SESSION_HEADER = 'HTTP_X_SESSION_ID'
+FRAME_SEQ_HEADER = 'HTTP_X_FRAME_SEQ'
+MAX_FRAME_SESSIONS = 1024
+
+FRAME_SESSIONS = OrderedDict() # session id -> _Session
+
+_frames_lock = threading.Lock()
+
+class FrameSuperseded(Exception):
+    def __init__(self, frame, latest):
+        super().__init__(f'Frame {frame[1]} superseded by {latest}')
+        self.frame = frame
+        self.latest = latest
+
+class _Session:
+    def __init__(self):
+        self.latest = -1
+        self.gate = threading.Lock() # One frame per session renders at a time
+
+def request_frame(request):
+    meta = request.META
+    session, seq = meta.get(FRAME_SESSION_HEADER), meta.get(FRAME_SEQ_HEADER)
+    if not session or seq is None:
+        return None
+    try:
+        return session, int(seq)
+    except ValueError:
+        return None
+
+def note_frame(frame):
+    session, seq = frame
+    with _frames_lock:
+        state = FRAME_SESSIONS.get(session)
+        if state is None:
+            state = FRAME_SESSIONS[session] = _Session()
+            if len(FRAME_SESSIONS) > MAX_FRAME_SESSIONS:
+                FRAME_SESSIONS.popitem(last=False)
+        FRAME_SESSIONS.move_to_end(session)
+        state.latest = max(state.latest, seq)
+    return state
+
+def check_frame(frame, state):
+    if state.latest > frame[1]:
+        raise FrameSuperseded(frame, state.latest)
+
+def superseded_response(e):
+    return JsonResponse({
+        'success': False,
+        'stale': True,
+        'seq': e.frame[1],
+        'latest_seq': e.latest,
+        'error': str(e),
+    }, status=409)
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    # Concurrent calls with the same key share one computation and its result.
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+class AsyncSingleFlight:
+    # SingleFlight for coroutines on one event loop: followers await the leader's task.
+    def __init__(self):
+        self._flights = {}
+
+    async def do(self, key, fn):
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        # shield: one caller disconnecting must not cancel the render for the rest
+        return await asyncio.shield(task)
+
+class StaleFrameMiddleware:
+    # Frames of one session render one at a time. While one renders, newer frames
+    # queue behind it, and only the newest of them is still current once the gate
+    # opens; the rest return 409 without parsing their body or taking a slot.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        frame = request_frame(request)
+        if frame is None:
+            return self.get_response(request)
+        state = note_frame(frame)
+        with state.gate:
+            try:
+                check_frame(frame, state)
+            except FrameSuperseded as e:
+                return superseded_response(e)
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        frame = request_frame(request)
+        if frame is None:
+            return await self.get_response(request)
+        state = note_frame(frame)
+        # Wait on a pool thread so the event loop keeps serving other sessions
+        await acquire_in_thread(state.gate.acquire, state.gate.release)
+        try:
+            try:
+                check_frame(frame, state)
+            except FrameSuperseded as e:
+                return superseded_response(e)
+            return await self.get_response(request)
+        finally:
+            state.gate.release()
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import Job
+from .scheduling import request_slot
+
+# kind -> callable(JobContext) returning the JSON-serialisable result
+JOB_HANDLERS = {}
+
+JOB_POLL_SECONDS = 1.0
+JOB_PROGRESS_INTERVAL = 0.5 # Seconds between progress writes; cancellation is checked on each
+JOB_HEARTBEAT_SECONDS = 10 # A running job's updated_at is refreshed at least this often
+JOB_STALE_SECONDS = 60 # Running jobs silent for this long lost their worker
+JOB_MAINTENANCE_SECONDS = 30 # Gap between purge/reap passes in the worker loop
+
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+_next_maintenance = 0.0
+
+def _reset_after_fork():
+    # Threads do not survive fork(); a forked server worker starts its own on first submit.
+    global _workers_lock, _wakeup
+    _workers.clear()
+    _workers_lock = threading.Lock()
+    _wakeup = threading.Event()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+class JobCancelled(Exception):
+    pass
+
+def job_handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+class JobContext:
+    def __init__(self, job):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.payload = job.payload
+        self._last_write = 0.0
+
+    def check_cancelled(self):
+        if Job.objects.filter(pk=self.job_id, cancel_requested=True).exists():
+            raise JobCancelled()
+
+    def progress(self, fraction, partial=None, force=False):
+        # Throttled so a tight inner loop does not turn into a stream of writes.
+        now = time.monotonic()
+        if not force and now - self._last_write < JOB_PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fields = {'progress': min(1.0, max(0.0, float(fraction))), 'updated_at': timezone.now()}
+        if partial is not None:
+            fields['partial_result'] = partial
+        Job.objects.filter(pk=self.job_id).update(**fields)
+        self.check_cancelled()
+
+def job_input_path(job_id, ext=''):
+    return os.path.join(settings.JOB_INPUT_ROOT, f'{job_id}{ext}')
+
+def _remove_inputs(job):
+    path = job.payload.get('input_path')
+    if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(settings.JOB_INPUT_ROOT):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _finish_fields(status, **fields):
+    now = timezone.now()
+    return dict(
+        status=status,
+        finished_at=now,
+        updated_at=now,
+        expires_at=now + timedelta(seconds=settings.JOB_RETENTION_SECONDS),
+        **fields,
+    )
+
+def _finish(job_id, status, **fields):
+    # Only from running: a job already failed as stale keeps that outcome.
+    Job.objects.filter(pk=job_id, status=Job.RUNNING).update(**_finish_fields(status, **fields))
+
+class _Heartbeat:
+    # Keeps a running job's updated_at fresh between progress reports, so a job is
+    # only taken for lost once its worker has actually stopped.
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+                try:
+                    Job.objects.filter(pk=self.job_id, status=Job.RUNNING).update(updated_at=timezone.now())
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            connection.close()
+
+def _claim_next():
+    # The conditional update is the lock: only one worker flips a given row to running.
+    for job_id in Job.objects.filter(status=Job.QUEUED).values_list('pk', flat=True)[:8]:
+        now = timezone.now()
+        if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+                status=Job.RUNNING, started_at=now, updated_at=now):
+            return Job.objects.get(pk=job_id)
+    return None
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.kind)
+    context = JobContext(job)
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job kind: {job.kind}')
+        # Jobs share the batch slots with heavy requests, but wait rather than being shed.
+        with _Heartbeat(job.id), request_slot('batch', shed=False):
+            context.check_cancelled()
+            result = handler(context)
+        _finish(job.id, Job.SUCCEEDED, progress=1.0, result=result)
+    except JobCancelled:
+        _finish(job.id, Job.CANCELLED)
+    except Exception as e:
+        traceback.print_exc()
+        _finish(job.id, Job.FAILED, error=str(e))
+    finally:
+        _remove_inputs(job)
+
+def _maintain():
+    global _next_maintenance
+    now = time.monotonic()
+    if now < _next_maintenance:
+        return
+    _next_maintenance = now + JOB_MAINTENANCE_SECONDS
+    purge_expired_jobs()
+    fail_stale_jobs()
+
+def _worker_loop():
+    while True:
+        close_old_connections()
+        try:
+            _maintain()
+            job = _claim_next()
+        except Exception:
+            traceback.print_exc()
+            job = None
+        if job is None:
+            _wakeup.wait(JOB_POLL_SECONDS)
+            _wakeup.clear()
+            continue
+        run_job(job)
+
+def fail_stale_jobs():
+    # A running job whose heartbeat stopped lost its worker (restart, crash).
+    cutoff = timezone.now() - timedelta(seconds=JOB_STALE_SECONDS)
+    for job in Job.objects.filter(status=Job.RUNNING, updated_at__lt=cutoff):
+        _remove_inputs(job)
+        _finish(job.id, Job.FAILED, error='Worker stopped before the job finished')
+
+def ensure_workers():
+    with _workers_lock:
+        if _workers:
+            return
+        fail_stale_jobs()
+        for i in range(max(1, settings.JOB_WORKERS)):
+            worker = threading.Thread(target=_worker_loop, name=f'job-worker-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+def purge_expired_jobs():
+    expired = Job.objects.filter(expires_at__lt=timezone.now())
+    for job in expired:
+        _remove_inputs(job)
+    return expired.delete()[0]
+
+def submit_job(kind, payload):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    purge_expired_jobs()
+    job = Job.objects.create(kind=kind, payload=payload)
+    ensure_workers()
+    _wakeup.set()
+    return job
+
+def cancel_job(job_id):
+    # Queued jobs are cancelled outright; running ones stop at their next progress report.
+    if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(**_finish_fields(Job.CANCELLED)):
+        _remove_inputs(Job.objects.get(pk=job_id))
+    else:
+        Job.objects.filter(pk=job_id, status=Job.RUNNING).update(cancel_requested=True, updated_at=timezone.now())
+    return Job.objects.filter(pk=job_id).first()
+
+def job_summary(job):
+    return {
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'partial_result': job.partial_result,
+        'result': job.result,
+        'error': job.error or None,
+        'cancel_requested': job.cancel_requested,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'expires_at': job.expires_at,
+    }
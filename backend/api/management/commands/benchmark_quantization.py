@@ -0,0 +1,117 @@
+import copy
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from django.core.management.base import BaseCommand, CommandError
+
+from api.quantization import quantize_model, quantized_layers, model_size_bytes
+
+DRONE_SR = 16000
+DRONE_CLIP_SECONDS = 5
+
+
+def synthetic_drone_clips(n_clips, seed=0):
+    # Fixed mix of rotor-like harmonic buzz and plain noise so runs are comparable.
+    rng = np.random.default_rng(seed)
+    t = np.arange(DRONE_SR * DRONE_CLIP_SECONDS) / DRONE_SR
+    clips = []
+    for i in range(n_clips):
+        clip = 0.1 * rng.standard_normal(len(t))
+        if i % 2 == 0:
+            f0 = rng.uniform(80, 300)
+            for h in range(1, 6):
+                clip += 0.3 / h * np.sin(2 * np.pi * h * f0 * t + rng.uniform(0, 2 * np.pi))
+        clips.append(clip.astype(np.float32))
+    return clips
+
+
+def load_audio_dir(path):
+    from api.views.audio_decode import decode_path
+    clips = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(('.wav', '.mp3', '.flac', '.ogg')):
+            decoded = decode_path(os.path.join(path, name), sr=DRONE_SR, duration=DRONE_CLIP_SECONDS)
+            clips.append(decoded['samples'])
+    return clips
+
+
+def synthetic_eeg_inputs(n_inputs, seed=0):
+    from api.utils import generate_synthetic_eeg, N_TIMES
+    np.random.seed(seed)
+    return [generate_synthetic_eeg(abnormality_type=i % 4)[0][:, :N_TIMES].astype(np.float32) for i in range(n_inputs)]
+
+
+def forward(model, x):
+    return model(**x).logits if isinstance(x, dict) else model(x)
+
+
+def run_model(model, inputs, repeats):
+    latencies, probabilities = [], []
+    with torch.inference_mode():
+        forward(model, inputs[0])
+        for x in inputs:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                logits = forward(model, x)
+                latencies.append(time.perf_counter() - start)
+            probabilities.append(F.softmax(logits, dim=1)[0].numpy())
+    return np.array(latencies) * 1000, np.stack(probabilities)
+
+
+class Command(BaseCommand):
+    help = 'Compare float32 and int8 dynamic-quantized inference for the drone classifier and EEGNet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['drone', 'eegnet', 'all'], default='drone')
+        parser.add_argument('--samples', type=int, default=16, help='Size of the fixed evaluation set')
+        parser.add_argument('--repeats', type=int, default=5, help='Timed runs per sample')
+        parser.add_argument('--audio-dir', help='Evaluate the drone model on these clips instead of synthetic ones')
+        parser.add_argument('--threads', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['threads']:
+            torch.set_num_threads(options['threads'])
+        if options['model'] in ('drone', 'all'):
+            self.benchmark('drone', *self.drone_setup(options), options['repeats'])
+        if options['model'] in ('eegnet', 'all'):
+            self.benchmark('eegnet', *self.eegnet_setup(options), options['repeats'])
+
+    def drone_setup(self, options):
+        from transformers import AutoModelForAudioClassification
+        from api.views.drone_views import MODEL_PATH, feature_extractor
+        if feature_extractor is None:
+            raise CommandError(f'Drone feature extractor could not be loaded from {MODEL_PATH}')
+        model = AutoModelForAudioClassification.from_pretrained(MODEL_PATH).eval()
+        clips = load_audio_dir(options['audio_dir']) if options['audio_dir'] else synthetic_drone_clips(options['samples'])
+        inputs = [dict(feature_extractor(clip, sampling_rate=DRONE_SR, return_tensors="pt")) for clip in clips]
+        return model, inputs
+
+    def eegnet_setup(self, options):
+        from api.utils import build_eegnet, BRAINDECODE_AVAILABLE, EEG_MODEL_WEIGHTS_PATH
+        if not BRAINDECODE_AVAILABLE or not os.path.exists(EEG_MODEL_WEIGHTS_PATH):
+            raise CommandError(f'EEGNet unavailable (braindecode missing or no weights at {EEG_MODEL_WEIGHTS_PATH})')
+        inputs = [torch.from_numpy(x).unsqueeze(0) for x in synthetic_eeg_inputs(options['samples'])]
+        return build_eegnet(), inputs
+
+    def benchmark(self, name, model, inputs, repeats):
+        quantized = quantize_model(copy.deepcopy(model))
+        if not quantized_layers(quantized):
+            # EEGNet is all convolutions, which dynamic quantization leaves alone.
+            raise CommandError(f'{name}: quantization replaced no layers; int8 would just rerun float32')
+        float_ms, float_probs = run_model(model, inputs, repeats)
+        quant_ms, quant_probs = run_model(quantized, inputs, repeats)
+
+        agreement = np.mean(float_probs.argmax(axis=1) == quant_probs.argmax(axis=1))
+        max_diff = np.abs(float_probs - quant_probs).max()
+
+        self.stdout.write(f'\n{name}: {len(inputs)} inputs x {repeats} runs, {torch.get_num_threads()} threads')
+        self.stdout.write(f"{'':10}{'median ms':>12}{'p95 ms':>12}{'weights MB':>12}")
+        for label, ms, m in (('float32', float_ms, model), ('int8', quant_ms, quantized)):
+            self.stdout.write(
+                f'{label:10}{np.median(ms):12.2f}{np.percentile(ms, 95):12.2f}{model_size_bytes(m) / 2 ** 20:12.2f}'
+            )
+        self.stdout.write(f'speedup {np.median(float_ms) / np.median(quant_ms):.2f}x, '
+                          f'top-1 agreement {agreement:.1%}, max probability difference {max_diff:.4f}')
@@ -0,0 +1,118 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from django.conf import settings
+
+# CPU-bound stages of the async views run here. Inputs travel as shared-memory
+# segments (name, shape, dtype), so only a small handle is pickled per call.
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _reset_after_fork():
+    # A forked server worker cannot use its parent's pool; it spawns its own on first use.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _init_worker(settings_module, warm_modules, threads):
+    # Runs once per worker: cap math-library threads so N workers do not
+    # oversubscribe the cores, then import the model modules so the first
+    # request a worker serves does not pay for loading them.
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(var, str(threads))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+    for module in warm_modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"⚠️ Offload worker could not preload {module}: {e}")
+
+def spawn_pool(max_workers, warm_modules=(), threads=1):
+    # spawn, not fork: the server process has threads (and possibly CUDA) running.
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(os.environ['DJANGO_SETTINGS_MODULE'], list(warm_modules), threads),
+    )
+
+def get_pool():
+    global _pool
+    if settings.OFFLOAD_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = spawn_pool(settings.OFFLOAD_WORKERS, settings.OFFLOAD_WARM_MODULES,
+                               settings.OFFLOAD_WORKER_THREADS)
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def share_array(array):
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, {'name': shm.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+def share_bytes(data):
+    return share_array(np.frombuffer(data, dtype=np.uint8))
+
+def attach_array(handle):
+    # Maps the segment without copying; the caller closes the returned shm once
+    # it no longer needs the array.
+    shm = shared_memory.SharedMemory(name=handle['name'])
+    return shm, np.ndarray(handle['shape'], dtype=np.dtype(handle['dtype']), buffer=shm.buf)
+
+def _call_shared(func, handles, args, kwargs):
+    # Attached segments are passed in place of their handles, then released.
+    attached = [attach_array(handle) for handle in handles]
+    segments = [shm for shm, _ in attached]
+    arrays = [array for _, array in attached]
+    del attached
+    try:
+        return func(*arrays, *args, **kwargs)
+    finally:
+        arrays.clear() # No views may outlive close()
+        for shm in segments:
+            shm.close()
+
+def _release_segments(segments):
+    for shm, _ in segments:
+        shm.close()
+        shm.unlink()
+
+async def run_cpu(func, *args, arrays=(), **kwargs):
+    # func must be a module-level callable. Each entry of `arrays` (ndarray or bytes)
+    # is shared for the duration of the call and passed first, as an ndarray.
+    segments = []
+    try:
+        for array in arrays:
+            shm, handle = share_bytes(array) if isinstance(array, (bytes, bytearray)) else share_array(array)
+            segments.append((shm, handle))
+        handles = [handle for _, handle in segments]
+        # No worker processes configured (pool is None): run on a thread so the event loop stays free.
+        future = asyncio.get_running_loop().run_in_executor(
+            get_pool(), _call_shared, func, handles, args, kwargs)
+    except BaseException:
+        _release_segments(segments)
+        raise
+    # Unlink only once the call has finished: a caller cancelled while the worker is
+    # still attaching must not pull the segments out from under it.
+    future.add_done_callback(lambda _: _release_segments(segments))
+    return await asyncio.shield(future)
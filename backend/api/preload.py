@@ -0,0 +1,76 @@
+import gc
+import importlib
+import os
+
+from django.conf import settings
+from django.db import connections
+
+# Preload-and-fork: the server master imports the model modules once, then forks its
+# workers. Weights are never written after loading, so their pages stay shared
+# copy-on-write and model memory does not grow with the number of workers.
+
+_preloading = False
+_after_fork = [] # Deferred while preloading; run in each worker by after_fork()
+
+def preloading():
+    # True while the master is importing models it is about to fork; modules use it
+    # to defer anything that does not survive fork() to their first request.
+    return _preloading
+
+def run_after_fork(func):
+    # For setup that starts threads, such as torch/OpenMP intra-op pools: a forked
+    # worker inherits the pool's state but not its threads. Runs at once unless
+    # the master is preloading.
+    if _preloading:
+        _after_fork.append(func)
+    else:
+        func()
+
+def after_fork():
+    for func in _after_fork:
+        func()
+
+def _single_threaded_master():
+    # Loading (and dynamic quantization) may run torch ops. Capped at one thread,
+    # OpenMP runs them inline and the master never starts a thread pool to fork.
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(1)
+
+def preload_models(modules=None):
+    global _preloading
+    _single_threaded_master()
+    _preloading = True
+    try:
+        for module in settings.PRELOAD_MODULES if modules is None else modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"⚠️ Could not preload {module}: {e}")
+    finally:
+        _preloading = False
+    # Workers open their own connections; a socket shared across fork() is corrupted
+    # by whichever process uses it first.
+    connections.close_all()
+    # Keep the collector off everything loaded so far. A collection writes to the
+    # header of every object it scans, which would unshare those pages in each worker.
+    gc.freeze()
+
+def process_memory(pid='self'):
+    # Resident memory split into pages shared with other processes and pages private
+    # to this one (kB, from /proc/<pid>/smaps_rollup; empty where that is unavailable).
+    fields = {'Rss': 'rss_kb', 'Pss': 'pss_kb', 'Shared_Clean': 'shared_kb', 'Shared_Dirty': 'shared_kb',
+              'Private_Clean': 'private_kb', 'Private_Dirty': 'private_kb'}
+    usage = {'pid': os.getpid() if pid == 'self' else pid}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in fields:
+                    key = fields[name]
+                    usage[key] = usage.get(key, 0) + int(rest.split()[0])
+    except (OSError, ValueError):
+        pass
+    return usage
@@ -0,0 +1,43 @@
+import io
+import os
+
+import torch
+from torch import nn
+
+# 'float32' runs the models as trained; 'quantized' swaps their Linear layers
+# for int8 dynamic-quantized ones (weights int8, activations quantized per batch).
+INFERENCE_PRECISION = os.environ.get('INFERENCE_PRECISION', 'float32')
+INFERENCE_PRECISIONS = ('float32', 'quantized')
+
+# Eager dynamic quantization only covers Linear/recurrent layers; convolutions stay float32.
+# An all-convolutional model such as EEGNet therefore has nothing to quantize.
+QUANTIZED_LAYER_TYPES = {nn.Linear}
+
+def quantizable_layers(model):
+    return sum(isinstance(m, tuple(QUANTIZED_LAYER_TYPES)) for m in model.modules())
+
+def quantized_layers(model):
+    return sum(type(m).__module__.startswith('torch.ao.nn.quantized') for m in model.modules())
+
+def model_precision(model):
+    return 'quantized' if quantized_layers(model) else 'float32'
+
+def quantize_model(model):
+    return torch.ao.quantization.quantize_dynamic(model, QUANTIZED_LAYER_TYPES, dtype=torch.qint8)
+
+def prepare_inference_model(model, precision=None):
+    precision = precision or INFERENCE_PRECISION
+    if precision not in INFERENCE_PRECISIONS:
+        raise ValueError(f'INFERENCE_PRECISION must be one of {INFERENCE_PRECISIONS}, got {precision!r}')
+    model.eval()
+    if precision == 'quantized':
+        if not quantizable_layers(model):
+            print(f"⚠️ {type(model).__name__} has no Linear layers to quantize; keeping it in float32")
+            return model
+        return quantize_model(model)
+    return model
+
+def model_size_bytes(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
@@ -0,0 +1,208 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+def spectrogram_tiles_class(request):
+    # Tiles are read from a prebuilt pyramid; the first request for a file builds it.
+    from .views.spectrogram_tiles import spectrogram_pyramid_exists
+    return 'interactive' if spectrogram_pyramid_exists(request.GET.get('file_id')) else 'batch'
+
+# URL name -> request class, or a callable picking one per request. Unlisted routes (uploads, demos, job submission) are cheap
+# or already deferred, so they run unscheduled.
+ROUTE_CLASSES = {
+    # Playback: polled several times a second while a recording plays
+    'ecg-graph': 'interactive',
+    'eeg-graph': 'interactive',
+    'waveform-chunk': 'interactive',
+    'frequency-stream': 'interactive',
+    'spectrogram-tiles': spectrogram_tiles_class,
+    'audio-file': 'interactive',
+    'doppler-result': 'interactive',
+    'job-detail': 'interactive',
+    # Heavy: model inference, restoration, simulation, image analysis
+    'detect-drone': 'batch',
+    'correct-aliasing': 'batch',
+    'sar-upload': 'batch',
+    'downsample-audio': 'batch',
+    'doppler-generate': 'batch',
+    'doppler-simulate': 'batch',
+    'doppler-predict': 'batch',
+    'doppler-sweep': 'batch',
+    'doppler-scene': 'batch',
+    'doppler-estimate': 'batch',
+    'ecg-predict': 'batch',
+    'eeg-predict': 'batch',
+}
+
+WAIT_SAMPLES = 1024 # Recent queue waits kept per class for the percentiles
+
+class Saturated(Exception):
+    def __init__(self, request_class, retry_after):
+        super().__init__(f'{request_class} requests are saturated')
+        self.request_class = request_class
+        self.retry_after = retry_after
+
+class RequestClass:
+    def __init__(self, name, concurrency, queue_depth, queue_timeout=None, shed=False, retry_after=1):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self.shed = shed
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    def acquire(self, shed=None):
+        # Returns the seconds spent queued. A shedding class refuses work once its
+        # queue is full or the wait runs past queue_timeout, instead of piling up.
+        shed = self.shed if shed is None else shed
+        with self._lock:
+            if shed and self.waiting >= self.queue_depth:
+                self.rejected += 1
+                raise Saturated(self.name, self.retry_after)
+            self.waiting += 1
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout if shed else None)
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+                raise Saturated(self.name, self.retry_after)
+            self.running += 1
+            self.admitted += 1
+            self.waits.append(waited)
+        return waited
+
+    def release(self):
+        with self._lock:
+            self.running -= 1
+        self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            waits = sorted(self.waits)
+            stats = {
+                'concurrency': self.concurrency,
+                'queue_depth': self.queue_depth,
+                'running': self.running,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
+        if waits:
+            stats['wait_ms'] = {
+                'mean': 1000 * sum(waits) / len(waits),
+                'p50': 1000 * waits[len(waits) // 2],
+                'p95': 1000 * waits[min(len(waits) - 1, int(0.95 * len(waits)))],
+                'max': 1000 * waits[-1],
+                'samples': len(waits),
+            }
+        else:
+            stats['wait_ms'] = None
+        return stats
+
+REQUEST_CLASSES = {
+    name: RequestClass(name, **limits) for name, limits in settings.REQUEST_CLASS_LIMITS.items()
+}
+
+@contextmanager
+def request_slot(request_class, shed=None):
+    pool = REQUEST_CLASSES[request_class]
+    waited = pool.acquire(shed)
+    try:
+        yield waited
+    finally:
+        pool.release()
+
+def scheduler_metrics():
+    return {name: pool.metrics() for name, pool in REQUEST_CLASSES.items()}
+
+async def acquire_in_thread(acquire, release):
+    # Blocking acquire on a pool thread, so the event loop keeps running. If the caller
+    # is cancelled meanwhile (client disconnected), the thread still gets the slot, so
+    # it is released on the caller's behalf once it does; otherwise it would be lost.
+    future = asyncio.ensure_future(sync_to_async(acquire, thread_sensitive=False)())
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        def release_late(done):
+            if not done.cancelled() and done.exception() is None:
+                release()
+        future.add_done_callback(release_late)
+        raise
+
+def request_pool(request):
+    if request.method == 'OPTIONS':
+        return None
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return None
+    request_class = ROUTE_CLASSES.get(match.url_name)
+    if callable(request_class):
+        request_class = request_class(request)
+    return REQUEST_CLASSES.get(request_class)
+
+def saturated_response(e):
+    response = JsonResponse({'error': str(e), 'retry_after': e.retry_after}, status=503)
+    response['Retry-After'] = str(e.retry_after)
+    return response
+
+def with_queue_timing(response, pool, waited):
+    response['Server-Timing'] = f'queue;desc="{pool.name}";dur={1000 * waited:.1f}'
+    return response
+
+class PrioritySchedulingMiddleware:
+    # Each request class has its own pool of slots, so a burst of heavy requests
+    # can only occupy the batch slots and never delays a playback frame's admission.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pool = request_pool(request)
+        if pool is None:
+            return self.get_response(request)
+        try:
+            waited = pool.acquire()
+        except Saturated as e:
+            return saturated_response(e)
+        try:
+            response = self.get_response(request)
+        finally:
+            pool.release()
+        return with_queue_timing(response, pool, waited)
+
+    async def __acall__(self, request):
+        pool = request_pool(request)
+        if pool is None:
+            return await self.get_response(request)
+        try:
+            waited = await acquire_in_thread(pool.acquire, pool.release)
+        except Saturated as e:
+            return saturated_response(e)
+        try:
+            response = await self.get_response(request)
+        finally:
+            pool.release()
+        return with_queue_timing(response, pool, waited)
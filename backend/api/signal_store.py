@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+# Arrays shared by every worker process on the host. Each entry is a directory of
+# .npy files plus meta.json (the index record); readers memory-map the .npy files,
+# so under /dev/shm all workers read the same pages and no worker holds a copy.
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+META_FILE = 'meta.json'
+LRU_TOUCH_SECONDS = 60 # Minimum gap between LRU timestamp updates for one entry
+MAX_OPEN_ENTRIES = 256 # Mappings each process keeps open
+
+class SignalStore:
+    def __init__(self, namespace, root=None, max_bytes=None, on_delete=None):
+        self.namespace = namespace
+        self.on_delete = on_delete # Called with each deleted or evicted key
+        self._root = root
+        self._max_bytes = max_bytes
+        self._opened = OrderedDict() # key -> (arrays, meta, touched), this process's mappings
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return os.path.join(self._root or settings.SIGNAL_STORE_ROOT, self.namespace)
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or settings.SIGNAL_STORE_MAX_BYTES
+
+    def _entry_path(self, key):
+        if not KEY_PATTERN.match(key) or '..' in key:
+            raise KeyError(key)
+        return os.path.join(self.root, key)
+
+    def put(self, key, arrays, meta=None):
+        path = self._entry_path(key)
+        os.makedirs(self.root, exist_ok=True)
+        # Build beside the target and rename into place, so readers in other
+        # processes see either no entry or a complete one.
+        staging = os.path.join(self.root, f'.{key}.{uuid.uuid4().hex}.tmp')
+        os.makedirs(staging)
+        try:
+            nbytes = 0
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                np.save(os.path.join(staging, f'{name}.npy'), array, allow_pickle=False)
+                nbytes += array.nbytes
+            with open(os.path.join(staging, META_FILE), 'w') as f:
+                json.dump({'arrays': list(arrays), 'nbytes': nbytes, 'meta': meta or {}}, f)
+            self._discard(key)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.rename(staging, path)
+            except OSError:
+                # Another worker stored the same key first; keep theirs.
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._evict(keep=key)
+
+    def get(self, key):
+        try:
+            path = self._entry_path(key)
+        except KeyError:
+            return None
+        meta_path = os.path.join(path, META_FILE)
+        with self._lock:
+            opened = self._opened.get(key)
+            if opened is not None:
+                self._opened.move_to_end(key)
+        if opened is not None:
+            if os.path.exists(meta_path):
+                arrays, meta, touched = opened
+                self._touch(key, path, touched)
+                return arrays, meta
+            self._discard(key)
+        try:
+            with open(meta_path) as f:
+                record = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+                for name in record['arrays']
+            }
+        except (FileNotFoundError, ValueError):
+            return None
+        with self._lock:
+            self._opened[key] = (arrays, record['meta'], 0.0)
+            if len(self._opened) > MAX_OPEN_ENTRIES:
+                self._opened.popitem(last=False)
+        self._touch(key, path, 0.0)
+        return arrays, record['meta']
+
+    def _touch(self, key, path, touched):
+        # Directory mtime is the shared LRU clock; refreshed at most once a minute.
+        now = time.time()
+        if now - touched < LRU_TOUCH_SECONDS:
+            return
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if key in self._opened:
+                arrays, meta, _ = self._opened[key]
+                self._opened[key] = (arrays, meta, now)
+
+    def __contains__(self, key):
+        try:
+            return os.path.exists(os.path.join(self._entry_path(key), META_FILE))
+        except KeyError:
+            return False
+
+    def _discard(self, key):
+        with self._lock:
+            self._opened.pop(key, None)
+
+    def delete(self, key):
+        self._discard(key)
+        try:
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+        except KeyError:
+            return
+        if self.on_delete is not None:
+            self.on_delete(key)
+
+    def entries(self):
+        # (key, nbytes, last used) for every complete entry
+        found = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return found
+        for key in names:
+            if key.startswith('.'):
+                continue
+            path = os.path.join(self.root, key)
+            try:
+                with open(os.path.join(path, META_FILE)) as f:
+                    nbytes = json.load(f)['nbytes']
+                found.append((key, nbytes, os.stat(path).st_mtime))
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+        return found
+
+    def _evict(self, keep=None):
+        # Oldest entries go first. Workers that still have one mapped keep reading
+        # it; its memory is freed once the last of them lets go.
+        entries = self.entries()
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for key, nbytes, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.delete(key)
+            total -= nbytes
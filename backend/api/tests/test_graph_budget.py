@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.views import graph_budget
+from api.views.graph_budget import GRAPH_QUALITY_LEVELS, StageCosts, choose_quality
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class StageCostsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('api.views.graph_budget.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.costs = StageCosts(smoothing=0.5, half_life=5.0)
+
+    def test_unmeasured_stage_is_free(self):
+        self.assertEqual(self.costs.estimate('line', 1000), 0.0)
+
+    def test_moving_average(self):
+        self.costs.record('line', 100, 100.0)
+        self.costs.record('line', 100, 300.0)
+        self.assertAlmostEqual(self.costs.estimate('line', 10), 20.0)
+
+    def test_estimate_decays_while_unmeasured(self):
+        self.costs.record('predict-ecg', 1, 500.0)
+        self.clock.now += 10.0
+        self.assertAlmostEqual(self.costs.estimate('predict-ecg'), 125.0)
+        self.assertAlmostEqual(self.costs.snapshot()['predict-ecg'], 125.0)
+
+    def test_skipped_stage_is_tried_again(self):
+        # A warm-up outlier pushes prediction out of the budget, but not for good.
+        with mock.patch.object(graph_budget, 'GRAPH_COSTS', self.costs):
+            self.costs.record('line', 1, 1.0)
+            self.costs.record('predict-ecg', 1, 400.0)
+            level, _ = choose_quality(100.0, 0.0, 'predict-ecg', 'line', lambda level: 10)
+            self.assertFalse(level['predict'])
+
+            self.clock.now += 20.0
+            level, _ = choose_quality(100.0, 0.0, 'predict-ecg', 'line', lambda level: 10)
+            self.assertEqual(level, GRAPH_QUALITY_LEVELS[0])
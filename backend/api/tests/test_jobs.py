@@ -0,0 +1,72 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api import jobs
+from api.jobs import JobCancelled, JobContext, _claim_next, _finish, cancel_job, fail_stale_jobs, run_job
+from api.models import Job
+
+class JobQueueTests(TestCase):
+
+    def test_each_job_is_claimed_once(self):
+        first = Job.objects.create(kind='test')
+        second = Job.objects.create(kind='test')
+
+        claimed = {_claim_next().id, _claim_next().id}
+        self.assertEqual(claimed, {first.id, second.id})
+        self.assertIsNone(_claim_next())
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 2)
+
+    def test_cancel_queued_job(self):
+        job = Job.objects.create(kind='test')
+        cancelled = cancel_job(job.id)
+        self.assertEqual(cancelled.status, Job.CANCELLED)
+        self.assertIsNotNone(cancelled.expires_at)
+        self.assertIsNone(_claim_next())
+
+    def test_cancel_running_job_stops_at_next_progress(self):
+        Job.objects.create(kind='test')
+        job = _claim_next()
+        context = JobContext(job)
+
+        self.assertEqual(cancel_job(job.id).status, Job.RUNNING)
+        with self.assertRaises(JobCancelled):
+            context.progress(0.5, force=True)
+
+    def test_run_job_records_result_and_errors(self):
+        def fail(context):
+            raise RuntimeError('boom')
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, {'ok': lambda context: {'value': 1}, 'fail': fail}), \
+                mock.patch('api.jobs.traceback.print_exc'):
+            Job.objects.create(kind='ok')
+            run_job(_claim_next())
+            Job.objects.create(kind='fail')
+            run_job(_claim_next())
+
+        ok = Job.objects.get(kind='ok')
+        self.assertEqual((ok.status, ok.result, ok.progress), (Job.SUCCEEDED, {'value': 1}, 1.0))
+        failed = Job.objects.get(kind='fail')
+        self.assertEqual((failed.status, failed.error), (Job.FAILED, 'boom'))
+
+    def test_stale_running_job_is_failed_and_keeps_outcome(self):
+        job = Job.objects.create(kind='test')
+        _claim_next()
+        old = timezone.now() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 1)
+        Job.objects.filter(pk=job.id).update(updated_at=old)
+
+        fail_stale_jobs()
+        # The original worker reporting back late must not overwrite the failure.
+        _finish(job.id, Job.SUCCEEDED, result={'late': True})
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNone(job.result)
+
+    def test_fresh_running_job_is_not_reaped(self):
+        Job.objects.create(kind='test')
+        job = _claim_next()
+        fail_stale_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
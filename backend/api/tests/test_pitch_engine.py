@@ -0,0 +1,41 @@
+import numpy as np
+from unittest import skipIf
+from django.test import SimpleTestCase
+
+from api.views.pitch_engine import (PITCH_CACHE, PITCH_CACHE_SIZE, PITCH_FRAME_LENGTH, PITCH_HOP_LENGTH,
+                                    clear_pitch, iter_pitch_blocks, librosa, track_pitch)
+
+SR = 22050
+
+def glide(seconds=4.0):
+    # A sweep from 110 Hz to 880 Hz, so every block sees a different pitch.
+    t = np.arange(int(seconds * SR)) / SR
+    freq = 110 * 8 ** (t / seconds)
+    return (0.5 * np.sin(2 * np.pi * np.cumsum(freq) / SR)).astype(np.float32)
+
+@skipIf(librosa is None, 'librosa is not installed')
+class TrackPitchTests(SimpleTestCase):
+
+    def tearDown(self):
+        PITCH_CACHE.clear()
+
+    def test_matches_librosa_yin(self):
+        samples = glide()
+        expected = librosa.yin(samples, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'), sr=SR,
+                               frame_length=PITCH_FRAME_LENGTH, hop_length=PITCH_HOP_LENGTH, center=True,
+                               pad_mode='constant')
+        np.testing.assert_allclose(track_pitch(samples, SR), expected, rtol=1e-6)
+
+        # Small blocks, so the comparison crosses many block boundaries.
+        blocks = np.concatenate([block for _, block in iter_pitch_blocks(samples, SR, block_frames=7, workers=2)])
+        np.testing.assert_allclose(blocks, expected, rtol=1e-6)
+
+    def test_cache_is_bounded_and_cleared(self):
+        samples = glide(0.5)
+        for file_id in range(PITCH_CACHE_SIZE + 5):
+            track_pitch(samples, SR, file_id=f'clip-{file_id}')
+        self.assertEqual(len(PITCH_CACHE), PITCH_CACHE_SIZE)
+        self.assertNotIn(('clip-0', len(samples), SR), PITCH_CACHE)
+
+        clear_pitch(f'clip-{PITCH_CACHE_SIZE}')
+        self.assertEqual(len(PITCH_CACHE), PITCH_CACHE_SIZE - 1)
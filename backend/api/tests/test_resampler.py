@@ -0,0 +1,26 @@
+import numpy as np
+from django.test import SimpleTestCase
+from scipy.signal import resample_poly
+
+from api.views.resampler import resample_to_rate
+
+class ResampleToRateTests(SimpleTestCase):
+    # resample_to_rate caches the filter resample_poly would design; output must not change.
+
+    def setUp(self):
+        self.samples = np.random.default_rng(0).standard_normal(22050).astype(np.float32)
+
+    def test_matches_resample_poly(self):
+        for new_rate, up, down in ((8000, 160, 441), (16000, 320, 441), (44100, 2, 1)):
+            with self.subTest(new_rate=new_rate):
+                ours = resample_to_rate(self.samples, 22050, new_rate)
+                np.testing.assert_allclose(ours, resample_poly(self.samples, up, down), atol=1e-6)
+
+    def test_repeated_rate_is_stable(self):
+        first = resample_to_rate(self.samples, 22050, 8000)
+        np.testing.assert_array_equal(resample_to_rate(self.samples, 22050, 8000), first)
+
+    def test_same_rate_returns_copy(self):
+        out = resample_to_rate(self.samples, 22050, 22050)
+        np.testing.assert_array_equal(out, self.samples)
+        self.assertIsNot(out, self.samples)
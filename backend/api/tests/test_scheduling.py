@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api import scheduling
+from api.scheduling import PrioritySchedulingMiddleware, RequestClass, Saturated, acquire_in_thread
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached')
+        time.sleep(0.005)
+
+class RequestClassTests(SimpleTestCase):
+
+    def test_full_queue_is_shed(self):
+        pool = RequestClass('batch', concurrency=1, queue_depth=1, queue_timeout=5, shed=True, retry_after=3)
+        pool.acquire()
+        waiter = threading.Thread(target=pool.acquire)
+        waiter.start()
+        wait_for(lambda: pool.waiting == 1)
+
+        with self.assertRaises(Saturated) as raised:
+            pool.acquire()
+        self.assertEqual(raised.exception.retry_after, 3)
+
+        pool.release()
+        waiter.join(2)
+        self.assertFalse(waiter.is_alive())
+        metrics = pool.metrics()
+        self.assertEqual((metrics['running'], metrics['admitted'], metrics['rejected']), (1, 2, 1))
+        pool.release()
+
+    def test_queue_timeout_is_shed(self):
+        pool = RequestClass('batch', concurrency=1, queue_depth=4, queue_timeout=0.01, shed=True)
+        pool.acquire()
+        with self.assertRaises(Saturated):
+            pool.acquire()
+        self.assertEqual((pool.waiting, pool.rejected), (0, 1))
+        pool.release()
+
+    def test_unshed_acquire_waits_for_a_slot(self):
+        pool = RequestClass('batch', concurrency=1, queue_depth=1, queue_timeout=0.01, shed=True)
+        pool.acquire()
+        waits = []
+        waiter = threading.Thread(target=lambda: waits.append(pool.acquire(shed=False)))
+        waiter.start()
+        wait_for(lambda: pool.waiting == 1)
+        time.sleep(0.05)
+        pool.release()
+        waiter.join(2)
+        self.assertGreaterEqual(waits[0], 0.05)
+        pool.release()
+
+    def test_cancelled_async_acquire_releases_its_slot(self):
+        pool = RequestClass('batch', concurrency=1, queue_depth=1)
+        pool.acquire()
+
+        async def cancel_waiter():
+            waiter = asyncio.ensure_future(acquire_in_thread(pool.acquire, pool.release))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            # The abandoned acquire gets the slot once it frees up, and gives it straight back.
+            pool.release()
+            for _ in range(200):
+                if pool.admitted == 2 and pool.running == 0:
+                    break
+                await asyncio.sleep(0.01)
+        asyncio.run(cancel_waiter())
+
+        self.assertEqual((pool.admitted, pool.running), (2, 0))
+
+@override_settings(ROOT_URLCONF='api.tests.urls')
+class PrioritySchedulingMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = PrioritySchedulingMiddleware(lambda request: HttpResponse('ok'))
+        self.batch = RequestClass('batch', concurrency=1, queue_depth=1, queue_timeout=0.01, shed=True,
+                                  retry_after=7)
+        patcher = mock.patch.dict(scheduling.REQUEST_CLASSES, {'batch': self.batch})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_admitted_request_reports_queue_time(self):
+        response = self.middleware(self.factory.get('/detect/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('queue;desc="batch"', response['Server-Timing'])
+        self.assertEqual(self.batch.running, 0)
+
+    def test_saturated_class_returns_503(self):
+        self.batch.acquire()
+        try:
+            response = self.middleware(self.factory.get('/detect/'))
+        finally:
+            self.batch.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+    def test_saturated_batch_does_not_block_interactive(self):
+        self.batch.acquire()
+        try:
+            response = self.middleware(self.factory.get('/graph/'))
+        finally:
+            self.batch.release()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('queue;desc="interactive"', response['Server-Timing'])
+
+    def test_unlisted_route_is_not_scheduled(self):
+        response = self.middleware(self.factory.get('/missing/'))
+        self.assertNotIn('Server-Timing', response)
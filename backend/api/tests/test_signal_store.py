@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.signal_store import SignalStore
+
+class SignalStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.deleted = []
+        # Room for three 8000-byte entries
+        self.store = SignalStore('test', root=self.root.name, max_bytes=24000, on_delete=self.deleted.append)
+
+    def put(self, key, age=0):
+        self.store.put(key, {'samples': np.arange(1000, dtype=np.float64)}, meta={'sr': 8000})
+        if age:
+            # Directory mtime is the LRU clock
+            stamp = time.time() - age
+            os.utime(os.path.join(self.store.root, key), (stamp, stamp))
+
+    def test_put_and_get_memory_map(self):
+        self.put('clip')
+        arrays, meta = self.store.get('clip')
+        self.assertEqual(meta, {'sr': 8000})
+        self.assertIsInstance(arrays['samples'], np.memmap)
+        self.assertFalse(arrays['samples'].flags.writeable)
+        np.testing.assert_array_equal(arrays['samples'], np.arange(1000))
+        self.assertIn('clip', self.store)
+
+    def test_unknown_and_invalid_keys(self):
+        self.assertIsNone(self.store.get('missing'))
+        self.assertIsNone(self.store.get('../escape'))
+        self.assertNotIn('../escape', self.store)
+        with self.assertRaises(KeyError):
+            self.put('../escape')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for age, key in ((400, 'a'), (300, 'b'), (200, 'c')):
+            self.put(key, age)
+        self.store.get('a') # Still in use; b becomes the oldest
+        self.put('d')
+
+        self.assertEqual(sorted(key for key, _, _ in self.store.entries()), ['a', 'c', 'd'])
+        self.assertEqual(self.deleted, ['b'])
+        self.assertIsNone(self.store.get('b'))
+
+    def test_entry_larger_than_budget_is_kept(self):
+        self.store.put('big', {'samples': np.zeros(5000)})
+        self.assertIn('big', self.store)
+
+    def test_delete_calls_on_delete(self):
+        self.put('clip')
+        self.store.get('clip')
+        self.store.delete('clip')
+        self.assertEqual(self.deleted, ['clip'])
+        self.assertIsNone(self.store.get('clip'))
@@ -0,0 +1,42 @@
+import numpy as np
+from unittest import skipIf
+from django.test import SimpleTestCase
+
+from api.views.stft_engine import librosa, stream_spectrogram
+
+SR = 22050
+N_FFT = 2048
+HOP = 512
+
+def tone_and_noise(seconds=3.0, seed=0):
+    t = np.arange(int(seconds * SR)) / SR
+    noise = np.random.default_rng(seed).standard_normal(len(t))
+    return (0.5 * np.sin(2 * np.pi * 440 * t) + 0.1 * noise).astype(np.float32)
+
+@skipIf(librosa is None, 'librosa is not installed')
+class StreamSpectrogramTests(SimpleTestCase):
+    # The streamed engine must reproduce the single-shot librosa pipeline it replaced.
+
+    def setUp(self):
+        self.samples = tone_and_noise()
+
+    def test_mel_matches_librosa(self):
+        ours, _ = stream_spectrogram(self.samples, SR, n_fft=N_FFT, hop_length=HOP, block_frames=37)
+        power = librosa.feature.melspectrogram(y=self.samples, sr=SR, n_fft=N_FFT, hop_length=HOP, n_mels=128,
+                                               fmax=8000, center=True, pad_mode='constant')
+        expected = librosa.power_to_db(power, ref=np.max, top_db=80)
+        self.assertEqual(ours.shape, expected.shape)
+        np.testing.assert_allclose(ours, expected, atol=1e-3)
+
+    def test_linear_matches_librosa(self):
+        ours, freqs = stream_spectrogram(self.samples, SR, n_fft=N_FFT, hop_length=HOP, use_mel=False,
+                                         fmax=8000, block_frames=37)
+        magnitude = np.abs(librosa.stft(self.samples, n_fft=N_FFT, hop_length=HOP, center=True, pad_mode='constant'))
+        expected = librosa.amplitude_to_db(magnitude, ref=np.max, top_db=80)[:len(freqs)]
+        self.assertEqual(ours.shape, expected.shape)
+        np.testing.assert_allclose(ours, expected, atol=1e-2)
+
+    def test_block_size_does_not_change_result(self):
+        small, _ = stream_spectrogram(self.samples, SR, block_frames=16)
+        whole, _ = stream_spectrogram(self.samples, SR, block_frames=4096)
+        np.testing.assert_allclose(small, whole, atol=1e-4)
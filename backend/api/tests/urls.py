@@ -0,0 +1,11 @@
+from django.http import HttpResponse
+from django.urls import path
+
+# Named like the real routes so the scheduling middleware classifies them.
+def ok(request):
+    return HttpResponse('ok')
+
+urlpatterns = [
+    path('detect/', ok, name='detect-drone'),
+    path('graph/', ok, name='ecg-graph'),
+]
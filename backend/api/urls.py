@@ -1,16 +1,21 @@
 
+from django.conf import settings
 from django.urls import path
 
 # Import all the necessary views from your different view files
-from .views.drone_views import DroneDetectionView, WaveformChunkView
-from .views.doppler_views import upload_doppler, generate_doppler, simulate_passing, predict_doppler 
+from .views.drone_views import DroneDetectionView, WaveformChunkView, FrequencyStreamView
+from .views.doppler_views import upload_doppler, generate_doppler, simulate_passing, predict_doppler, sweep_doppler, simulate_scene, estimate_doppler, doppler_result_parts
 from .views.sar_views import upload_sar
-from .views.audio import downsample_audio
+from .views.audio import downsample_audio, serve_audio_file
+from .views.spectrogram_tiles import spectrogram_tiles
 from .views.ecg_views import ECGPredictView,EEGPredictView
 
 
 # --- IMPORT THE NEW VIEW ---
 from .views.correction_aliasing import correct_aliasing_view
+from .views.job_views import submit_job_view, job_detail
+from .views.metrics_views import scheduler_metrics_view, memory_metrics_view
+from .views import async_views
 
 from .views.ecg_views import (
     EEGDemoView,
@@ -27,22 +32,37 @@ urlpatterns = [
     # Drone URLs
     path('audio/detect/', DroneDetectionView.as_view(), name='detect-drone'),
     path('audio/waveform-chunk/', WaveformChunkView.as_view(), name='waveform-chunk'),
+    path('audio/frequency-stream/', FrequencyStreamView.as_view(), name='frequency-stream'),
     
     # Doppler URLs
     path('doppler/upload/', upload_doppler, name='doppler-upload'),
     path('doppler/generate/', generate_doppler, name='doppler-generate'),
     path('doppler/simulate/', simulate_passing, name='doppler-simulate'),
     path('doppler/predict/', predict_doppler, name='doppler-predict'),
+    path('doppler/result/', doppler_result_parts, name='doppler-result'),
+    path('doppler/sweep/', sweep_doppler, name='doppler-sweep'),
+    path('doppler/scene/', simulate_scene, name='doppler-scene'),
+    path('doppler/estimate/', estimate_doppler, name='doppler-estimate'),
     
     # SAR URL
     path('sar/upload/', upload_sar, name='sar-upload'),
     
     # General Audio URL
     path('audio/downsample/', downsample_audio, name='downsample-audio'),
+    path('audio/<str:audio_id>.wav', serve_audio_file, name='audio-file'),
+    path('audio/spectrogram/', spectrogram_tiles, name='spectrogram-tiles'),
 
     # --- ADD THE NEW URL PATTERN ---
     path('correct-aliasing/', correct_aliasing_view, name='correct-aliasing'),
 
+    # Background jobs: submit returns a job_id to poll, DELETE cancels
+    path('jobs/<uuid:job_id>/', job_detail, name='job-detail'),
+    path('jobs/<str:kind>/', submit_job_view, name='job-submit'),
+
+    # Queue wait and shedding counters per request class
+    path('metrics/scheduler/', scheduler_metrics_view, name='scheduler-metrics'),
+    path('metrics/memory/', memory_metrics_view, name='memory-metrics'),
+
     # EEG URLs
     path('eeg/demo/', EEGDemoView.as_view(), name='eeg-demo'),
     path('eeg/upload/', EEGUploadView.as_view(), name='eeg-upload'),
@@ -58,4 +78,14 @@ urlpatterns = [
     # ... existing patterns ...
     path('ecg/predict/', ECGPredictView.as_view(), name='ecg-predict'),
     path('eeg/predict/', EEGPredictView.as_view(), name='eeg-predict'),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_VIEWS:
+    # Same names, so the scheduler and frame coalescing treat them like the sync views.
+    # Django resolves the first match, so these go in front.
+    urlpatterns = [
+        path('eeg/graph/', async_views.eeg_graph, name='eeg-graph'),
+        path('ecg/graph/', async_views.ecg_graph, name='ecg-graph'),
+        path('ecg/predict/', async_views.ecg_predict, name='ecg-predict'),
+        path('eeg/predict/', async_views.eeg_predict, name='eeg-predict'),
+    ] + urlpatterns
\ No newline at end of file
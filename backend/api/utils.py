@@ -11,6 +11,10 @@ import wfdb
 import tempfile
 import shutil
 import sys
+import threading
+
+from .quantization import prepare_inference_model, model_precision
+from .preload import preloading
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
@@ -88,6 +92,14 @@ COLOR_SCHEMES = {
 
 # ============= MODEL LOADING =============
 
+def build_eegnet():
+    """Build the float32 EEGNet and load its trained weights"""
+    model = EEGNet(n_chans=19, n_outputs=4, n_times=1024, drop_prob=0.5)
+    state_dict = torch.load(EEG_MODEL_WEIGHTS_PATH, map_location=torch.device('cpu'))
+    model.load_state_dict(state_dict, strict=False)
+    return model.eval()
+
+
 def load_eegnet_model():
     """Load the EEGNet model for EEG prediction"""
     global EEG_MODEL_LOADED, eegnet_model
@@ -102,12 +114,9 @@ def load_eegnet_model():
             return False
         
         print("📦 Loading EEG model...")
-        eegnet_model = EEGNet(n_chans=19, n_outputs=4, n_times=1024, drop_prob=0.5)
-        state_dict = torch.load(EEG_MODEL_WEIGHTS_PATH, map_location=torch.device('cpu'))
-        eegnet_model.load_state_dict(state_dict, strict=False)
-        eegnet_model.eval()
+        eegnet_model = prepare_inference_model(build_eegnet())
         EEG_MODEL_LOADED = True
-        print(f"✅ EEG model loaded successfully")
+        print(f"✅ EEG model loaded successfully ({model_precision(eegnet_model)})")
         return True
         
     except Exception as e:
@@ -142,12 +151,17 @@ def load_ecg_model():
         return False
 
 
-# Load models on module import
+# Load models on module import. TensorFlow's runtime threads do not survive fork(),
+# so when the master preloads models (api.preload) each worker loads the Keras
+# model on its first ECG prediction instead.
 print("=" * 60)
 print("🚀 Initializing Signal Processing Module")
 print("=" * 60)
 load_eegnet_model()
-load_ecg_model()
+ECG_MODEL_DEFERRED = preloading()
+_ecg_load_lock = threading.Lock()
+if not ECG_MODEL_DEFERRED:
+    load_ecg_model()
 print("=" * 60)
 
 
@@ -224,6 +238,14 @@ def predict_ecg_abnormality(data):
     if data.ndim == 1:
         data = data.reshape(1, -1)
     
+    global ECG_MODEL_DEFERRED
+    if ECG_MODEL_DEFERRED:
+        # Concurrent first requests wait for the load rather than fall back
+        with _ecg_load_lock:
+            if ECG_MODEL_DEFERRED:
+                load_ecg_model()
+                ECG_MODEL_DEFERRED = False
+    
     if ECG_MODEL_LOADED and ecg_model is not None:
         try:
             return _predict_ecg_with_model(data)
@@ -573,7 +595,7 @@ def generate_polar_graph_data(data, fs, position, channels, zoom, polar_mode, pu
     return traces
 
 
-def generate_recurrence_graph_data(data, fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap):
+def generate_recurrence_graph_data(data, fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap, bins=50):
     total_samples = data.shape[1]
     window_samples = max(1, int(zoom * fs))
     start_idx = int(position * fs) % total_samples
@@ -581,7 +603,7 @@ def generate_recurrence_graph_data(data, fs, position, channels, zoom, rec_ch_x,
     if rec_ch_x < data.shape[0] and rec_ch_y < data.shape[0]:
         x_data = window[rec_ch_x, :]
         y_data = window[rec_ch_y, :]
-        hist, xedges, yedges = np.histogram2d(x_data, y_data, bins=50)
+        hist, xedges, yedges = np.histogram2d(x_data, y_data, bins=bins)
         return {
             'z': hist.T.tolist(),
             'x': xedges.tolist(),
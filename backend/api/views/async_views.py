@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from ..frames import AsyncSingleFlight
+from ..offload import run_cpu
+
+# ASGI counterparts of the ECG/EEG graph and predict views. The event loop only
+# reads the body; parsing, rendering and inference run in an offload worker,
+# which receives the raw body through shared memory.
+
+GRAPH_FLIGHTS = AsyncSingleFlight()
+
+def _signal_view(kind, graph):
+    from .ecg_views import ECGGraphView, EEGGraphView, ECGPredictView, EEGPredictView
+    if graph:
+        return {'ecg': ECGGraphView, 'eeg': EEGGraphView}[kind]()
+    return {'ecg': ECGPredictView, 'eeg': EEGPredictView}[kind]()
+
+def _payload(body):
+    return json.loads(body.tobytes()) if body.size else {}
+
+def render_graph_frame(body, kind):
+    return _signal_view(kind, graph=True).render(_payload(body))
+
+def predict_signal(body, kind):
+    return _signal_view(kind, graph=False).predict(_payload(body))
+
+async def _offloaded(call):
+    try:
+        data, code = await call
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({'error': str(e), 'success': False}, status=500)
+    return JsonResponse(data, status=code, safe=False)
+
+async def _graph(request, kind):
+    body = request.body
+    key = (kind, hashlib.sha256(body).hexdigest())
+    return await _offloaded(
+        GRAPH_FLIGHTS.do(key, lambda: run_cpu(render_graph_frame, kind, arrays=[body]))
+    )
+
+async def _predict(request, kind):
+    return await _offloaded(run_cpu(predict_signal, kind, arrays=[request.body]))
+
+@csrf_exempt
+@require_POST
+async def ecg_graph(request):
+    return await _graph(request, 'ecg')
+
+@csrf_exempt
+@require_POST
+async def eeg_graph(request):
+    return await _graph(request, 'eeg')
+
+@csrf_exempt
+@require_POST
+async def ecg_predict(request):
+    return await _predict(request, 'ecg')
+
+@csrf_exempt
+@require_POST
+async def eeg_predict(request):
+    return await _predict(request, 'eeg')
@@ -4,14 +4,27 @@ from rest_framework.response import Response
 from rest_framework import status
 import numpy as np
 import base64
+import hashlib
 import io
 import os
 import math
-import tempfile
+import re
+import shutil
+import time
 import uuid
 from scipy.io import wavfile
-from scipy.signal import resample
+from scipy.signal import welch
 import wave
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponse, Http404
+from django.urls import reverse
+
+from .stft_engine import stream_spectrogram, count_frames, pool_max
+from .pitch_engine import track_pitch, pitch_points, clear_pitch
+from .resampler import resample_to_rate
+from .audio_decode import decode_pcm, decode_upload, decode_path, read_sample_rate
+from ..signal_store import SignalStore
 
 try:
     import librosa
@@ -20,23 +33,18 @@ except ImportError:
 
 EPS = 1e-8
 SPEED_OF_SOUND = 343.0
-AUDIO_STORAGE = {}
+ENVELOPE_BUCKET_COUNTS = (250, 500, 1000, 2000)
+AUDIO_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+MAX_DOWNSAMPLE_RATES = 16
+SPECTRUM_SEGMENT = 2048
+DERIVED_SWEEP_SECONDS = 600 # Gap between sweeps for files left by clips no longer stored
+_next_derived_sweep = 0.0
 
 def parse_wav_from_data_uri(contents):
     header, b64 = contents.split(',', 1)
-    audio_bytes = base64.b64decode(b64)
-    bio = io.BytesIO(audio_bytes)
-    sr, data = wavfile.read(bio)
-    
-    if data.dtype == np.int16:
-        samples = data.astype(np.float32) / 32767.0
-    else:
-        samples = data.astype(np.float32)
-        if samples.dtype.kind in 'iu':
-            samples /= np.iinfo(data.dtype).max
-    
-    if samples.ndim == 2:
-        samples = samples.mean(axis=1)
+    _, samples, sr = decode_pcm(base64.b64decode(b64))
+    samples = np.array(samples)
     
     duration = samples.shape[0] / sr
     return {'sr': int(sr), 'samples': samples, 'duration': float(duration)}
@@ -65,39 +73,27 @@ def compute_spectrogram(samples, sr, n_fft=2048, hop_length=512, n_mels=128, fma
     if not librosa:
         return None
     
-    if use_mel:
-        S = librosa.feature.melspectrogram(
-            y=samples, 
-            sr=sr, 
-            n_mels=n_mels, 
-            fmax=fmax,
-            n_fft=n_fft,
-            hop_length=hop_length
-        )
-        S_dB = librosa.power_to_db(S, ref=np.max)
-        freqs = librosa.mel_frequencies(n_mels=n_mels, fmax=fmax)
-    else:
-        stft = librosa.stft(y=samples, n_fft=n_fft, hop_length=hop_length)
-        magnitude = np.abs(stft)
-        S_dB = librosa.amplitude_to_db(magnitude, ref=np.max)
-        freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
-        
-        freq_mask = freqs <= fmax
-        freqs = freqs[freq_mask]
-        S_dB = S_dB[freq_mask, :]
+    n_frames = count_frames(len(samples), hop_length)
+    time_step = 1
+    if max_time_points and n_frames > max_time_points:
+        time_step = max(1, n_frames // max_time_points)
     
-    S_dB = np.clip(S_dB, -80, 0)
-    times = librosa.frames_to_time(np.arange(S_dB.shape[1]), sr=sr, hop_length=hop_length)
-    
-    if max_time_points and len(times) > max_time_points:
-        time_step = max(1, len(times) // max_time_points)
-        times = times[::time_step]
-        S_dB = S_dB[:, ::time_step]
+    S_dB, freqs = stream_spectrogram(
+        samples,
+        sr,
+        n_fft=n_fft,
+        hop_length=hop_length,
+        use_mel=use_mel,
+        n_mels=n_mels,
+        fmax=fmax,
+        time_pool=time_step
+    )
+    times = librosa.frames_to_time(np.arange(0, n_frames, time_step), sr=sr, hop_length=hop_length)
     
     if max_freq_points and len(freqs) > max_freq_points:
         freq_step = max(1, len(freqs) // max_freq_points)
         freqs = freqs[::freq_step]
-        S_dB = S_dB[::freq_step, :]
+        S_dB = pool_max(S_dB, freq_step, axis=0, fill=-80)
     
     return {
         'z': S_dB.tolist(),
@@ -119,14 +115,66 @@ def compute_full_analysis(samples, sr):
     
     return initial_waveform, spectrogram
 
+def compute_envelope(samples, bucket_counts=ENVELOPE_BUCKET_COUNTS):
+    samples = np.asarray(samples, dtype=np.float32)
+    total_points = len(samples)
+    envelope, finest, finest_n = {}, None, 0
+    
+    for n_buckets in sorted(bucket_counts, reverse=True):
+        if n_buckets > total_points:
+            continue
+        if finest is not None and finest_n % n_buckets == 0:
+            group = finest_n // n_buckets
+            idx = np.arange(0, finest_n, group)
+            level = {
+                'start': finest['start'][idx],
+                'end': finest['end'][idx + group - 1],
+                'min': np.minimum.reduceat(finest['min'], idx),
+                'max': np.maximum.reduceat(finest['max'], idx),
+            }
+        else:
+            starts = np.linspace(0, total_points, n_buckets + 1).astype(np.int64)[:-1]
+            level = {
+                'start': starts,
+                'end': np.append(starts[1:], total_points),
+                'min': np.minimum.reduceat(samples, starts),
+                'max': np.maximum.reduceat(samples, starts),
+            }
+            if finest is None:
+                finest, finest_n = level, n_buckets
+        envelope[n_buckets] = level
+    
+    return envelope
+
+def envelope_preview(envelope, sr, max_preview_points):
+    usable = [n for n in envelope if 2 * n <= max_preview_points]
+    if not usable:
+        return None
+    level = envelope[max(usable)]
+
+    t = np.empty(2 * len(level['start']), dtype=np.float64)
+    y = np.empty(2 * len(level['start']), dtype=np.float32)
+    t[0::2] = level['start'] / sr
+    t[1::2] = (level['end'] - 1) / sr
+    y[0::2] = level['min']
+    y[1::2] = level['max']
+    return t, y
+
 def make_waveform(store, play_pos=None):
-    sr, samples, duration = store['sr'], np.array(store['samples']), store['duration']
+    sr, samples, duration = store['sr'], np.asarray(store['samples'], dtype=np.float32), store['duration']
     max_preview_points, window_width = 4000, 3.0
     total_points = len(samples)
     
-    step = math.ceil(total_points / max_preview_points) if total_points > max_preview_points else 1
-    preview = samples[::step].tolist()
-    t_preview = np.linspace(0, duration, len(samples[::step])).tolist()
+    preview = None
+    if total_points > max_preview_points:
+        envelope = store.get('envelope')
+        if envelope is None:
+            envelope = compute_envelope(samples)
+        preview = envelope_preview(envelope, sr, max_preview_points)
+    if preview is None:
+        t_preview, y_preview = np.linspace(0, duration, total_points), samples
+    else:
+        t_preview, y_preview = preview
     
     center = float(play_pos) if play_pos else 0.0
     start_t = max(0.0, center - window_width * 0.2)
@@ -140,7 +188,7 @@ def make_waveform(store, play_pos=None):
         y_window = samples[start_idx:end_idx].tolist()
     
     return {
-        'preview': {'t': t_preview, 'y': preview},
+        'preview': {'t': t_preview.tolist(), 'y': y_preview.tolist()},
         'window': {'t': t_window, 'y': y_window, 'range': [start_t, end_t]},
     }
 
@@ -165,113 +213,377 @@ def is_chunk_complete(position, total_samples, view_seconds, sr):
     window_size = int(view_seconds * sr)
     return position + window_size > total_samples
 
-def store_audio(samples, sr):
-    file_id = str(uuid.uuid4())
-    AUDIO_STORAGE[file_id] = {
-        'samples': samples if isinstance(samples, np.ndarray) else np.array(samples),
+def generate_waveform_frames(samples, sr, position, n_frames, view_seconds=2.0):
+    if not isinstance(samples, np.ndarray):
+        samples = np.array(samples)
+
+    total_samples = len(samples)
+    window_size = int(view_seconds * sr)
+
+    positions = []
+    current = position
+    for _ in range(max(0, int(n_frames))):
+        if is_chunk_complete(current, total_samples, view_seconds, sr):
+            break
+        current = get_next_chunk_position(current, view_seconds, sr)
+        positions.append(current)
+
+    if not positions:
+        return None
+
+    span_start = positions[0]
+    span_end = min(total_samples, positions[-1] + window_size)
+    span = samples[span_start:span_end]
+
+    return {
+        'start_index': int(span_start),
+        'start_time': span_start / sr,
+        'sr': int(sr),
+        'amplitude': span.tolist(),
+        'frame_offsets': [int(p - span_start) for p in positions],
+        'frame_length': int(window_size),
+        'new_position': int(positions[-1]),
+        'is_last': is_chunk_complete(positions[-1], total_samples, view_seconds, sr),
+    }
+
+def _audio_entry(samples, sr, normalize=False):
+    samples = samples if isinstance(samples, np.ndarray) else np.array(samples)
+    return {
+        'samples': samples,
         'sr': sr,
-        'duration': len(samples) / sr
+        'duration': len(samples) / sr,
+        'envelope': compute_envelope(samples),
+        'normalize': normalize, # Peak-normalise when written out for playback
     }
+
+class AudioStorage:
+    # Dict-like front for the shared signal store: entries keep the _audio_entry
+    # shape, but samples and envelope are memory-mapped from the store, so every
+    # worker sees every file_id and the host holds one copy of each.
+    def __init__(self, store):
+        self.store = store
+
+    def __setitem__(self, file_id, entry):
+        arrays = {'samples': np.asarray(entry['samples'])}
+        for n, level in entry['envelope'].items():
+            for field, values in level.items():
+                arrays[f'envelope_{n}_{field}'] = values
+        sr = entry['sr']
+        self.store.put(file_id, arrays, {
+            'sr': sr.item() if hasattr(sr, 'item') else sr,
+            'duration': float(entry['duration']),
+            'envelope': [int(n) for n in entry['envelope']],
+            'normalize': bool(entry.get('normalize', False)),
+        })
+        sweep_derived_files()
+
+    def get(self, file_id, default=None):
+        found = self.store.get(file_id)
+        if found is None:
+            return default
+        arrays, meta = found
+        return {
+            'samples': arrays['samples'],
+            'sr': meta['sr'],
+            'duration': meta['duration'],
+            'normalize': meta.get('normalize', False),
+            'envelope': {
+                n: {field: arrays[f'envelope_{n}_{field}'] for field in ('start', 'end', 'min', 'max')}
+                for n in meta['envelope']
+            },
+        }
+
+    def __getitem__(self, file_id):
+        entry = self.get(file_id)
+        if entry is None:
+            raise KeyError(file_id)
+        return entry
+
+    def __contains__(self, file_id):
+        return file_id in self.store
+
+    def __delitem__(self, file_id):
+        self.store.delete(file_id)
+
+def remove_derived_files(audio_id):
+    # The WAV, spectrogram pyramid and pitch track derived from a clip go when the
+    # clip does (the pitch track only from this process's cache).
+    clear_pitch(audio_id)
+    path = audio_file_path(audio_id)
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(os.path.join(settings.SPECTROGRAM_CACHE_ROOT, audio_id), ignore_errors=True)
+
+def sweep_derived_files(min_age=DERIVED_SWEEP_SECONDS):
+    # Catches files whose clip left the store without remove_derived_files running,
+    # e.g. a /dev/shm store cleared by a reboot. Runs at most once per min_age, and
+    # skips recent files so builds in progress are left alone.
+    global _next_derived_sweep
+    now = time.time()
+    if now < _next_derived_sweep:
+        return
+    _next_derived_sweep = now + min_age
+    for root, suffix in ((settings.AUDIO_FILE_ROOT, '.wav'), (settings.SPECTROGRAM_CACHE_ROOT, '')):
+        try:
+            names = os.listdir(root)
+        except FileNotFoundError:
+            continue
+        for name in names:
+            path = os.path.join(root, name)
+            audio_id = name[:len(name) - len(suffix)]
+            try:
+                if os.stat(path).st_mtime > now - min_age:
+                    continue
+                if name.endswith(suffix) and audio_id in AUDIO_STORAGE:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            except (FileNotFoundError, KeyError):
+                continue
+
+AUDIO_STORAGE = AudioStorage(SignalStore('audio', on_delete=remove_derived_files))
+
+def store_audio(samples, sr, normalize=False):
+    file_id = str(uuid.uuid4())
+    AUDIO_STORAGE[file_id] = _audio_entry(samples, sr, normalize)
     return file_id
 
+def store_asset_from_data_uri(contents):
+    asset_id = hashlib.sha256(contents.split(',', 1)[-1].encode('ascii')).hexdigest()
+    if asset_id not in AUDIO_STORAGE:
+        parsed = parse_wav_from_data_uri(contents)
+        AUDIO_STORAGE[asset_id] = _audio_entry(parsed['samples'], parsed['sr'])
+    return asset_id
+
 def get_audio(file_id):
     return AUDIO_STORAGE.get(file_id)
 
+def get_or_load_audio(file_id, sr=16000):
+    stored = AUDIO_STORAGE.get(file_id)
+    if stored is not None:
+        return stored
+
+    fs = FileSystemStorage(location=settings.TEMP_FILE_ROOT)
+    if not fs.exists(file_id):
+        return None
+
+    print(f"Loading {file_id} from disk into memory cache...")
+    y, sr = load_audio_file(fs.path(file_id), sr=sr)
+    AUDIO_STORAGE[file_id] = _audio_entry(y, sr)
+    return AUDIO_STORAGE[file_id]
+
 def clear_audio(file_id):
-    if file_id in AUDIO_STORAGE:
-        del AUDIO_STORAGE[file_id]
+    del AUDIO_STORAGE[file_id]
 
-def load_audio_file(file_path, sr=None, mono=True, duration=None):
-    if not librosa:
-        raise ImportError("librosa is required for loading audio files")
-    return librosa.load(file_path, sr=sr, mono=mono, duration=duration)
+def audio_file_path(audio_id):
+    if not AUDIO_ID_PATTERN.match(audio_id) or '..' in audio_id:
+        return None
+    return os.path.join(settings.AUDIO_FILE_ROOT, f'{audio_id}.wav')
+
+def write_wav_file(path, samples, sr, normalize=False):
+    # Same scaling as audio_to_base64, so clips compared side by side keep their
+    # relative loudness; normalize is for renders that were served peak-normalised.
+    samples = np.asarray(samples, dtype=np.float32)
+    if normalize and len(samples):
+        samples = samples / (np.max(np.abs(samples)) + EPS)
+    int16 = np.clip(samples * 32767, -32768, 32767).astype(np.int16)
+    # Write beside the target and rename so concurrent readers never see a partial file.
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    wavfile.write(tmp_path, int(sr), int16)
+    os.replace(tmp_path, path)
+
+def ensure_audio_file(audio_id):
+    path = audio_file_path(audio_id)
+    if path is None:
+        return None
+    if not os.path.exists(path):
+        stored = get_audio(audio_id)
+        if stored is None:
+            return None
+        write_wav_file(path, stored['samples'], stored['sr'], stored['normalize'])
+    return path
+
+def audio_url(request, audio_id):
+    return request.build_absolute_uri(reverse('audio-file', args=[audio_id]))
+
+class _RangeReader:
+    # Caps reads at the requested byte range; FileResponse streams from it in blocks.
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+def parse_range(header, size):
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(size - 1, int(last)) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+def serve_audio_file(request, audio_id):
+    path = ensure_audio_file(audio_id)
+    if path is None:
+        raise Http404('Audio not found or expired')
+
+    size = os.path.getsize(path)
+    header = request.headers.get('Range')
+    try:
+        byte_range = parse_range(header, size) if header else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type='audio/wav')
+    else:
+        start, end = byte_range
+        f = open(path, 'rb')
+        f.seek(start)
+        response = FileResponse(_RangeReader(f, end - start + 1), status=206, content_type='audio/wav')
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+def load_audio_file(file_path, sr=None, duration=None):
+    # Downmixed to mono; decoded PCM is shared with every other reader of the same content.
+    decoded = decode_path(file_path, sr=sr, duration=duration)
+    return decoded['samples'], decoded['sr']
 
 def get_original_sample_rate(file_path):
-    if not librosa:
-        return 16000
     try:
-        return librosa.get_samplerate(file_path)
+        return read_sample_rate(file_path)
     except Exception as e:
         print(f"Warning: Could not get original sample rate: {e}")
         return 16000
 
-def compute_frequency_over_time(samples, sr, max_points=2000):
+def compute_frequency_over_time(samples, sr, max_points=2000, file_id=None):
     if not librosa:
         return {'time': [], 'frequency': []}
     try:
-        f0 = librosa.yin(
-            samples, 
-            fmin=librosa.note_to_hz('C2'), 
-            fmax=librosa.note_to_hz('C7')
-        )
-        times = librosa.times_like(f0, sr=sr)
-        f0_with_nulls = np.where(np.isnan(f0), None, f0)
+        f0 = track_pitch(samples, sr, file_id=file_id)
         step = max(1, len(f0) // max_points)
+        times, frequency = pitch_points(f0, 0, sr, step)
         return {
-            'time': times[::step].tolist(),
-            'frequency': f0_with_nulls[::step].tolist()
+            'time': times,
+            'frequency': frequency
         }
     except Exception as e:
         print(f"Frequency estimation error: {e}")
         return {'time': [], 'frequency': []}
 
+def store_upload(file):
+    # Uploads are keyed by content so repeated sweeps over the same clip skip decoding.
+    decoded = decode_upload(file)
+    if decoded['digest'] not in AUDIO_STORAGE:
+        AUDIO_STORAGE[decoded['digest']] = _audio_entry(decoded['samples'], decoded['sr'])
+    return decoded['digest']
+
+def parse_rates(data):
+    if hasattr(data, 'getlist') and data.getlist('new_rates'):
+        values = data.getlist('new_rates')
+    else:
+        values = data.get('new_rates') or data.get('new_rate', '0')
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return [int(float(v)) for value in values for v in str(value).split(',') if v.strip()]
+
+def rate_spectrum(samples, sr):
+    nperseg = min(SPECTRUM_SEGMENT, len(samples))
+    freqs, power = welch(samples, fs=sr, nperseg=nperseg)
+    return {
+        'frequency': freqs.tolist(),
+        'magnitude_db': (10 * np.log10(power + EPS)).tolist(),
+    }
+
+def downsampled_id(original_id, new_rate):
+    # Named after its inputs, so the store itself is the memo and shares it across workers.
+    down_id = f'{original_id}-{new_rate}'
+    if down_id not in AUDIO_STORAGE:
+        stored = AUDIO_STORAGE[original_id]
+        AUDIO_STORAGE[down_id] = _audio_entry(resample_to_rate(stored['samples'], stored['sr'], new_rate), new_rate)
+    return down_id
+
 @api_view(['POST'])
-@parser_classes([MultiPartParser, FormParser])
+@parser_classes([MultiPartParser, FormParser, JSONParser])
 def downsample_audio(request):
     try:
         file = request.FILES.get('file')
-        new_rate_str = request.data.get('new_rate', '0')
+        original_id = request.data.get('file_id')
+        include_spectra = str(request.data.get('spectra', '')).lower() in ('1', 'true', 'yes')
        
-        if not file:
+        if not file and not original_id:
             return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
        
-        file_ext = file.name.lower().split('.')[-1]
-        if file_ext not in ['wav', 'mp3']:
-            return Response({'error': 'Only WAV and MP3 files are supported.'},
-                          status=status.HTTP_400_BAD_REQUEST)
-       
         try:
-            new_rate = int(new_rate_str)
+            rates = parse_rates(request.data)
         except ValueError:
             return Response({'error': 'Invalid sample rate'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        file.seek(0)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as tmp_file:
-            tmp_file.write(file.read())
-            tmp_path = tmp_file.name
+        if not rates:
+            return Response({'error': 'At least one sample rate is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rates) > MAX_DOWNSAMPLE_RATES:
+            return Response({'error': f'At most {MAX_DOWNSAMPLE_RATES} rates per request'}, status=status.HTTP_400_BAD_REQUEST)
        
-        try:
-            if file_ext == 'wav':
-                rate, samples = wavfile.read(tmp_path)
-                if len(samples.shape) > 1:
-                    samples = samples[:, 0]
-                samples = samples.astype(float) / 32768
-            else:
-                samples, rate = librosa.load(tmp_path, sr=None, mono=True)
-           
+        if file:
+            file_ext = file.name.lower().split('.')[-1]
+            if file_ext not in ['wav', 'mp3']:
+                return Response({'error': 'Only WAV and MP3 files are supported.'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            original_id = store_upload(file)
+        elif original_id not in AUDIO_STORAGE:
+            return Response({'error': 'File not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+        
+        rate = AUDIO_STORAGE[original_id]['sr']
+        results = []
+        for new_rate in rates:
             if new_rate <= 0:
                 new_rate = rate // 2
             if new_rate >= rate:
                 new_rate = rate
             
-            num_samples = int(len(samples) * new_rate / rate)
-            new_signal = resample(samples, num_samples)
-            
-            original_b64 = audio_to_base64(samples, rate)
-            down_b64 = audio_to_base64(new_signal, new_rate)
-            
-            return Response({
-                'original_rate': int(rate),
-                'new_rate': new_rate,
-                'original_audio': f"data:audio/wav;base64,{original_b64}",
-                'downsampled_audio': f"data:audio/wav;base64,{down_b64}",
-            })
-       
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+            down_id = original_id if new_rate == rate else downsampled_id(original_id, new_rate)
+            result = {
+                'rate': new_rate,
+                'audio_id': down_id,
+                'url': audio_url(request, down_id),
+            }
+            if include_spectra:
+                result['spectrum'] = rate_spectrum(AUDIO_STORAGE[down_id]['samples'], new_rate)
+            results.append(result)
+        
+        return Response({
+            'original_rate': int(rate),
+            'original_id': original_id,
+            'original_audio': audio_url(request, original_id),
+            'results': results,
+            'new_rate': results[0]['rate'],
+            'downsampled_audio': results[0]['url'],
+            'downsampled_id': results[0]['audio_id'],
+        })
            
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
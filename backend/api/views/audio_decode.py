@@ -0,0 +1,131 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .resampler import resample_to_rate
+
+try:
+    import soundfile as sf
+    # Older soundfile releases raise plain RuntimeError and have no LibsndfileError
+    SNDFILE_ERRORS = (RuntimeError, getattr(sf, 'LibsndfileError', RuntimeError))
+except ImportError:
+    sf = None
+    SNDFILE_ERRORS = (RuntimeError,)
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+PCM_CACHE = OrderedDict()
+PCM_CACHE_MAX_BYTES = 128 * 2 ** 20 # Per process; clips larger than this are not cached
+
+_cache_lock = threading.Lock()
+_cache_bytes = 0
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def read_upload(file):
+    file.seek(0)
+    return b''.join(file.chunks()) if hasattr(file, 'chunks') else file.read()
+
+def _decode(data, duration=None):
+    # libsndfile reads the header and PCM in one pass; anything it cannot
+    # open (older builds without MP3) falls back to librosa/audioread.
+    # With a duration, only that many leading seconds are decoded.
+    if sf is not None:
+        try:
+            with sf.SoundFile(io.BytesIO(data)) as f:
+                frames = -1 if duration is None else int(duration * f.samplerate)
+                samples = f.read(frames, dtype='float32', always_2d=True)
+                return samples.mean(axis=1), int(f.samplerate)
+        except SNDFILE_ERRORS:
+            pass
+    if librosa is None:
+        raise ImportError('soundfile or librosa is required for decoding audio')
+    # audioread only opens paths, so the fallback goes through a temporary file.
+    # delete=False and an explicit remove, so it can be reopened on Windows too.
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+    try:
+        samples, sr = librosa.load(f.name, sr=None, mono=True, duration=duration)
+    finally:
+        os.remove(f.name)
+    return np.asarray(samples, dtype=np.float32), int(sr)
+
+def read_sample_rate(path):
+    # From the file header, without decoding any audio
+    if sf is not None:
+        try:
+            return int(sf.info(path).samplerate)
+        except SNDFILE_ERRORS:
+            pass
+    if librosa is None:
+        raise ImportError('soundfile or librosa is required for decoding audio')
+    return int(librosa.get_samplerate(path))
+
+def decode_pcm(data, digest=None, duration=None):
+    # Returns (digest, samples, sr) at the file's native rate, decoding each
+    # distinct content only once. A cached full decode also serves a duration
+    # request; a partial decode is not cached.
+    digest = digest or content_hash(data)
+    with _cache_lock:
+        cached = PCM_CACHE.get(digest)
+        if cached is not None:
+            PCM_CACHE.move_to_end(digest)
+            return (digest,) + cached
+
+    samples, sr = _decode(data, duration)
+    samples.setflags(write=False)
+    if duration is None:
+        _cache_pcm(digest, samples, sr)
+    return digest, samples, sr
+
+def _cache_pcm(digest, samples, sr):
+    global _cache_bytes
+    if samples.nbytes > PCM_CACHE_MAX_BYTES:
+        return
+    with _cache_lock:
+        if digest in PCM_CACHE:
+            return
+        PCM_CACHE[digest] = (samples, sr)
+        _cache_bytes += samples.nbytes
+        while _cache_bytes > PCM_CACHE_MAX_BYTES:
+            _, (evicted, _) = PCM_CACHE.popitem(last=False)
+            _cache_bytes -= evicted.nbytes
+
+def conform(samples, sr, target_sr=None, duration=None):
+    if duration is not None:
+        samples = samples[:int(duration * sr)]
+    if target_sr and int(target_sr) != sr:
+        return resample_to_rate(samples, sr, int(target_sr)), int(target_sr)
+    return np.array(samples, dtype=np.float32), sr
+
+def decode_upload(file, sr=None, duration=None):
+    digest, samples, native_sr = decode_pcm(read_upload(file), duration=duration)
+    samples, out_sr = conform(samples, native_sr, sr, duration)
+    return {'digest': digest, 'samples': samples, 'sr': out_sr, 'original_sr': native_sr}
+
+def decode_path(path, sr=None, duration=None):
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest, samples, native_sr = decode_pcm(data, duration=duration)
+    samples, out_sr = conform(samples, native_sr, sr, duration)
+    return {'digest': digest, 'samples': samples, 'sr': out_sr, 'original_sr': native_sr}
+
+def clear_pcm(digest=None):
+    global _cache_bytes
+    with _cache_lock:
+        if digest is None:
+            PCM_CACHE.clear()
+            _cache_bytes = 0
+        else:
+            cached = PCM_CACHE.pop(digest, None)
+            if cached is not None:
+                _cache_bytes -= cached[0].nbytes
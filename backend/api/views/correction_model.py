@@ -2,73 +2,110 @@
 
 import torch
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from voicefixer import VoiceFixer
-import librosa
-import numpy as np       
-import soundfile as sf   
+import numpy as np
+import soundfile as sf
+
+from .audio import load_audio_file
+from .resampler import resample_to_rate
 
 # --- Global Model Cache ---
 VOICE_FIXER_MODEL = None
 MIN_SAMPLES = 2048 # The model needs at least this many samples
 
+# --- Segmenting ---
+VOICEFIXER_SR = 44100 # VoiceFixer works on 44.1 kHz audio in and out
+SEGMENT_SECONDS = 10.0
+OVERLAP_SECONDS = 0.5
+SEGMENT_WORKERS = 1
+
 def load_voicefixer_model():
     global VOICE_FIXER_MODEL
     if VOICE_FIXER_MODEL is None:
         try:
             print("--- Loading VoiceFixer model (this may take a moment)... ---")
-            VOICE_FIXER_MODEL = VoiceFixer() 
+            VOICE_FIXER_MODEL = VoiceFixer()
             print("--- ✅ VoiceFixer model loaded successfully. ---")
         except Exception as e:
             print(f"--- ❌ Error loading VoiceFixer model: {e} ---")
             VOICE_FIXER_MODEL = None
 
-def fix_aliasing(input_path, output_path):
+def segment_starts(n_samples, segment, overlap):
+    # The last segment may be shorter, but always extends past the overlap it shares.
+    if n_samples <= segment:
+        return [0]
+    return list(range(0, n_samples - overlap, segment - overlap))
+
+def crossfade_weights(length, fade_in, fade_out):
+    # sin^2 / cos^2 ramps sum to one across each overlap, so a steady
+    # signal passes through the seams unchanged.
+    weights = np.ones(length, dtype=np.float32)
+    if fade_in:
+        weights[:fade_in] = np.sin(0.5 * np.pi * (np.arange(fade_in) + 0.5) / fade_in) ** 2
+    if fade_out:
+        weights[-fade_out:] = np.cos(0.5 * np.pi * (np.arange(fade_out) + 0.5) / fade_out) ** 2
+    return weights
+
+def restore_segment(segment):
+    # Short tails are zero-padded like the old whole-file path, then trimmed back.
+    padded = np.concatenate([segment, np.zeros(MIN_SAMPLES, dtype=np.float32)])
+    restored = np.squeeze(VOICE_FIXER_MODEL.restore_inmem(padded, cuda=torch.cuda.is_available(), mode=0))
+    restored = np.asarray(restored, dtype=np.float32)[:len(segment)]
+    if len(restored) < len(segment):
+        restored = np.pad(restored, (0, len(segment) - len(restored)))
+    return restored
+
+def fix_aliasing_array(samples, sr, workers=SEGMENT_WORKERS, segment_seconds=SEGMENT_SECONDS,
+                       overlap_seconds=OVERLAP_SECONDS, on_progress=None):
 
     if VOICE_FIXER_MODEL is None:
         load_voicefixer_model()
         if VOICE_FIXER_MODEL is None:
             raise Exception("VoiceFixer model is not loaded. Check server logs.")
 
-    # --- UPDATED VALIDATION AND PADDING STEP ---
-    try:
-        print(f"--- Validating and padding audio file: {input_path} ---")
-        
-        # Load the audio file
-        y, sr = librosa.load(input_path, sr=None, mono=True)
-        num_samples = len(y)
-        print(f"--- Audio file has {num_samples} samples. ---")
-        
-        # 1. Check if it's too short overall
-        if num_samples < MIN_SAMPLES:
-            raise ValueError(
-                f"Audio file is too short ({num_samples} samples) to be processed. "
-                f"The model requires at least {MIN_SAMPLES} samples. "
-                f"Try using a higher resample rate."
-            )
-        
-        padding_duration = MIN_SAMPLES
-    
-        padding = np.zeros(padding_duration, dtype=np.float32)
-        
-        y_padded = np.concatenate([y, padding])
-        
-        print(f"--- Padded audio to {len(y_padded)} samples. ---")
-        
-        sf.write(input_path, y_padded, sr)
-        print(f"--- Overwrote temp file with padded version. ---")
-
-    except Exception as e:
-        raise ValueError(f"Error loading or validating audio file: {e}")
-    
-
-    print(f"--- Running anti-aliasing on PADDED file: {input_path} ---")
-
-    VOICE_FIXER_MODEL.restore(
-        input=input_path,
-        output=output_path,
-        cuda=torch.cuda.is_available(), 
-        mode=0
-    )
+    num_samples = len(samples)
+    if num_samples < MIN_SAMPLES:
+        raise ValueError(
+            f"Audio file is too short ({num_samples} samples) to be processed. "
+            f"The model requires at least {MIN_SAMPLES} samples. "
+            f"Try using a higher resample rate."
+        )
+
+    y = resample_to_rate(samples, sr, VOICEFIXER_SR)
+    segment = max(MIN_SAMPLES, int(segment_seconds * VOICEFIXER_SR))
+    overlap = min(segment // 2, int(overlap_seconds * VOICEFIXER_SR))
+    starts = segment_starts(len(y), segment, overlap)
+    output = np.zeros(len(y), dtype=np.float32)
+    print(f"--- Restoring {len(y)} samples in {len(starts)} segment(s) with {workers} worker(s) ---")
+
+    def accumulate(index, restored):
+        fade_in = overlap if index > 0 else 0
+        fade_out = overlap if index < len(starts) - 1 else 0
+        start = starts[index]
+        output[start:start + len(restored)] += restored * crossfade_weights(len(restored), fade_in, fade_out)
+        if on_progress is not None:
+            on_progress(index + 1, len(starts))
+
+    # At most 2 * workers segments are in flight, so memory stays bounded for long clips.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque()
+        for index, start in enumerate(starts):
+            pending.append((index, executor.submit(restore_segment, y[start:start + segment])))
+            if len(pending) >= 2 * max(1, workers):
+                done, future = pending.popleft()
+                accumulate(done, future.result())
+        while pending:
+            done, future = pending.popleft()
+            accumulate(done, future.result())
+
+    return output, VOICEFIXER_SR
+
+def fix_aliasing(input_path, output_path):
+    y, sr = load_audio_file(input_path)
+    restored, out_sr = fix_aliasing_array(y, sr)
+    sf.write(output_path, restored, out_sr)
     print(f"--- Corrected file saved to {output_path} ---")
 
-load_voicefixer_model()
\ No newline at end of file
+load_voicefixer_model()
@@ -0,0 +1,123 @@
+import numpy as np
+
+from .audio import SPEED_OF_SOUND, EPS
+from .stft_engine import stream_spectrogram
+
+ESTIMATOR_N_FFT = 4096
+ESTIMATOR_HOP_LENGTH = 512
+ESTIMATOR_FMIN = 50.0
+ESTIMATOR_FMAX = 4000.0
+RIDGE_MAX_JUMP = 3
+RIDGE_JUMP_PENALTY = 1.0
+SPLIT_CANDIDATES = 48
+
+def track_ridge(S_dB, max_jump=RIDGE_MAX_JUMP, jump_penalty=RIDGE_JUMP_PENALTY):
+    # Viterbi over frequency bins: each frame adds its dB score, and moving
+    # k bins between frames costs jump_penalty * k, for |k| <= max_jump.
+    n_bins, n_frames = S_dB.shape
+    score = S_dB[:, 0].astype(np.float64)
+    backpointer = np.empty((n_frames, n_bins), dtype=np.int32)
+    backpointer[0] = np.arange(n_bins)
+    bins = np.arange(n_bins)
+
+    for t in range(1, n_frames):
+        best, best_from = score.copy(), bins.copy()
+        for k in range(1, max_jump + 1):
+            for shift in (k, -k):
+                source = np.clip(bins - shift, 0, n_bins - 1)
+                candidate = score[source] - jump_penalty * k
+                better = candidate > best
+                best[better] = candidate[better]
+                best_from[better] = source[better]
+        score = best + S_dB[:, t]
+        backpointer[t] = best_from
+
+    path = np.empty(n_frames, dtype=np.int64)
+    path[-1] = int(np.argmax(score))
+    for t in range(n_frames - 1, 0, -1):
+        path[t - 1] = backpointer[t, path[t]]
+    return path
+
+def refine_ridge(S_dB, path):
+    # Parabolic interpolation around each ridge bin for sub-bin frequency.
+    frames = np.arange(S_dB.shape[1])
+    inner = np.clip(path, 1, S_dB.shape[0] - 2)
+    left, centre, right = S_dB[inner - 1, frames], S_dB[inner, frames], S_dB[inner + 1, frames]
+    denom = left - 2 * centre + right
+    offset = np.where(np.abs(denom) > EPS, 0.5 * (left - right) / np.where(np.abs(denom) > EPS, denom, 1.0), 0.0)
+    return inner + np.clip(offset, -0.5, 0.5)
+
+def _fit_approach(times, freqs, f_source, duration):
+    # f = f_s * c / (c - v(t)), v(t) = v0 + (v1 - v0) t / T  =>  v(t) = c (1 - f_s / f)
+    speeds = SPEED_OF_SOUND * (1.0 - f_source / freqs)
+    design = np.column_stack([1.0 - times / duration, times / duration])
+    (v_start, v_end), residual, _, _ = np.linalg.lstsq(design, speeds, rcond=None)
+    model = SPEED_OF_SOUND * f_source / (SPEED_OF_SOUND - design @ [v_start, v_end])
+    return {
+        'model': 'approach',
+        'f_source': float(f_source),
+        'v_start': float(v_start),
+        'v_end': float(v_end),
+        'residual_hz': float(np.sqrt(np.mean((model - freqs) ** 2))),
+    }
+
+def _fit_pass_by(times, freqs, duration):
+    # Approach: 1/f = u - p - q t, recede: 1/f = u + p + q t with
+    # u = 1/f_s, p = v0 / (c f_s), q = (v1 - v0) / (c f_s T). Linear in (u, p, q),
+    # so each candidate closest-approach split is one least-squares solve.
+    inverse = 1.0 / freqs
+    best = None
+    for split in np.linspace(0.2, 0.8, SPLIT_CANDIDATES) * duration:
+        sign = np.where(times < split, -1.0, 1.0)
+        design = np.column_stack([np.ones_like(times), sign, sign * times])
+        coeffs, _, _, _ = np.linalg.lstsq(design, inverse, rcond=None)
+        error = float(np.sum((design @ coeffs - inverse) ** 2))
+        if best is None or error < best[0]:
+            best = (error, split, coeffs, design)
+
+    _, split, (u, p, q), design = best
+    f_source = 1.0 / u
+    v_start = SPEED_OF_SOUND * f_source * p
+    v_end = v_start + SPEED_OF_SOUND * f_source * q * duration
+    model = 1.0 / (design @ [u, p, q])
+    return {
+        'model': 'pass_by',
+        'f_source': float(f_source),
+        'v_start': float(v_start),
+        'v_end': float(v_end),
+        'closest_approach_time': float(split),
+        'residual_hz': float(np.sqrt(np.mean((model - freqs) ** 2))),
+    }
+
+def estimate_doppler_parameters(samples, sr, f_source=None, max_points=500):
+    samples = np.asarray(samples, dtype=np.float32)
+    duration = len(samples) / sr
+    fmax = min(ESTIMATOR_FMAX, sr / 2)
+    S_dB, freqs = stream_spectrogram(
+        samples, sr, n_fft=ESTIMATOR_N_FFT, hop_length=ESTIMATOR_HOP_LENGTH, use_mel=False, fmax=fmax
+    )
+    if S_dB is None:
+        raise ImportError('librosa is required for Doppler estimation')
+
+    low = int(np.searchsorted(freqs, ESTIMATOR_FMIN))
+    S_dB = np.asarray(S_dB[low:], dtype=np.float64)
+    bin_hz = sr / ESTIMATOR_N_FFT
+    path = track_ridge(S_dB)
+    ridge = (refine_ridge(S_dB, path) + low) * bin_hz
+    times = np.arange(len(ridge)) * ESTIMATOR_HOP_LENGTH / sr
+
+    # Ignore the zero-padded edge frames and frames where the ridge is near the floor.
+    edge = ESTIMATOR_N_FFT / 2 / sr
+    ridge_level = S_dB[path, np.arange(len(path))]
+    valid = (times > edge) & (times < duration - edge) & (ridge_level > -60)
+    if np.count_nonzero(valid) < 4:
+        raise ValueError('Audio is too short or too quiet to track a frequency ridge')
+
+    if f_source is not None:
+        estimate = _fit_approach(times[valid], ridge[valid], float(f_source), duration)
+    else:
+        estimate = _fit_pass_by(times[valid], ridge[valid], duration)
+
+    step = max(1, len(ridge) // max_points)
+    estimate['ridge'] = {'time': times[::step].tolist(), 'frequency': ridge[::step].tolist()}
+    return estimate
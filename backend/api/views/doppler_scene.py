@@ -0,0 +1,118 @@
+import numpy as np
+
+from .audio import get_audio, SPEED_OF_SOUND, EPS
+from .resampler import resample_block, DEFAULT_QUALITY
+
+SCENE_BLOCK_SIZE = 65536
+MAX_SCENE_SECONDS = 600
+MAX_SCENE_SOURCES = 32
+DEFAULT_SCENE_SR = 22050
+MIN_SCENE_SR = 8000
+MAX_SCENE_SR = 48000
+MIN_DISTANCE = 1.0
+DELAY_ITERATIONS = 6
+GEOMETRY_STEP = 16
+TONE_HARMONICS = 4
+
+def parse_scene_source(data, duration):
+    source = {
+        'asset_id': data.get('asset_id'),
+        'f_source': float(data['f_source']) if data.get('f_source') is not None else None,
+        'v_start': float(data.get('v_start', 20.0)),
+        'v_end': float(data.get('v_end', data.get('v_start', 20.0))),
+        'closest_approach_time': float(data.get('closest_approach_time', duration / 2)),
+        'closest_approach_distance': max(MIN_DISTANCE, float(data.get('closest_approach_distance', 10.0))),
+        'direction': -1.0 if float(data.get('direction', 1)) < 0 else 1.0,
+        'gain': float(data.get('gain', 1.0)),
+        'samples': None,
+        'sr': None,
+    }
+
+    if max(abs(source['v_start']), abs(source['v_end'])) >= SPEED_OF_SOUND:
+        raise ValueError('Source speed must stay below the speed of sound')
+
+    if source['asset_id']:
+        stored = get_audio(source['asset_id'])
+        if stored is None:
+            raise LookupError(f"Asset {source['asset_id']} not found or expired")
+        if len(stored['samples']) == 0:
+            raise ValueError(f"Asset {source['asset_id']} has no samples")
+        source['samples'] = np.asarray(stored['samples'], dtype=np.float32)
+        source['sr'] = stored['sr']
+    elif source['f_source'] is None:
+        raise ValueError('Each source needs an asset_id or an f_source')
+
+    return source
+
+def _source_params(sources, key):
+    return np.array([s[key] for s in sources], dtype=np.float64)[:, np.newaxis]
+
+def emission_geometry(t, sources, duration):
+    # For every source and reception time t, solve tau + r(tau) / c = t by
+    # fixed-point iteration; it contracts because |v| < c.
+    v_start = _source_params(sources, 'v_start')
+    accel = (_source_params(sources, 'v_end') - v_start) / max(duration, EPS)
+    t_ca = _source_params(sources, 'closest_approach_time')
+    distance = _source_params(sources, 'closest_approach_distance')
+    direction = _source_params(sources, 'direction')
+
+    tau = t[np.newaxis, :] - distance / SPEED_OF_SOUND
+    for _ in range(DELAY_ITERATIONS):
+        x = direction * (v_start * (tau - t_ca) + 0.5 * accel * (tau ** 2 - t_ca ** 2))
+        r = np.sqrt(x ** 2 + distance ** 2)
+        tau = t[np.newaxis, :] - r / SPEED_OF_SOUND
+    return tau, r
+
+def harmonic_tone(f_source, tau):
+    phase = 2 * np.pi * f_source * tau
+    tone = np.zeros(tau.shape, dtype=np.float64)
+    for h in range(1, TONE_HARMONICS + 1):
+        tone += np.sin(h * phase) / h
+    return tone.astype(np.float32)
+
+def render_scene(sources, duration, sr, quality=DEFAULT_QUALITY, block_size=SCENE_BLOCK_SIZE):
+    n_samples = int(duration * sr)
+    mix = np.zeros(n_samples, dtype=np.float32)
+    distance = _source_params(sources, 'closest_approach_distance')
+    gain = _source_params(sources, 'gain')
+
+    for start in range(0, n_samples, block_size):
+        stop = min(n_samples, start + block_size)
+        t = np.arange(start, stop, dtype=np.float64) / sr
+        # Delay and distance vary slowly, so solve them on a coarse grid
+        # and interpolate to every sample.
+        t_coarse = np.append(t[::GEOMETRY_STEP], t[-1])
+        tau_coarse, r_coarse = emission_geometry(t_coarse, sources, duration)
+        tau = np.stack([np.interp(t, t_coarse, row) for row in tau_coarse])
+        r = np.stack([np.interp(t, t_coarse, row) for row in r_coarse])
+        attenuation = (gain * distance / np.maximum(r, MIN_DISTANCE)).astype(np.float32)
+
+        for k, source in enumerate(sources):
+            if source['samples'] is not None:
+                # Reading a source recorded above the scene rate decimates it; lower
+                # the kernel cutoff to the scene's Nyquist so it does not alias.
+                cutoff = min(1.0, sr / source['sr'])
+                signal = resample_block(source['samples'], tau[k] * source['sr'], quality,
+                                        cutoff=cutoff, wrap=True)
+            else:
+                signal = harmonic_tone(source['f_source'], tau[k])
+            mix[start:stop] += attenuation[k] * signal
+
+    mix /= np.max(np.abs(mix)) + EPS
+    return mix
+
+def scene_summary(source, duration):
+    accel = (source['v_end'] - source['v_start']) / max(duration, EPS)
+    speed = source['v_start'] + accel * source['closest_approach_time']
+    summary = {
+        'asset_id': source['asset_id'],
+        'closest_approach_time': source['closest_approach_time'],
+        'closest_approach_distance': source['closest_approach_distance'],
+        'speed_at_closest_approach': speed,
+    }
+    if source['f_source'] is not None:
+        summary['observed'] = {
+            'approach': source['f_source'] * SPEED_OF_SOUND / (SPEED_OF_SOUND - abs(speed) + EPS),
+            'recede': source['f_source'] * SPEED_OF_SOUND / (SPEED_OF_SOUND + abs(speed) + EPS),
+        }
+    return summary
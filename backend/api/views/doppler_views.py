@@ -5,16 +5,31 @@ from rest_framework import status
 import numpy as np
 import base64
 import os
+import threading
+from collections import OrderedDict
+from scipy import fft as sp_fft
+from scipy.signal import get_window
 
 from .audio import (
-    parse_wav_from_data_uri,
-    write_wav_data_uri,
-    compute_full_analysis,
+    audio_url,
+    compute_spectrogram,
     make_waveform,
     store_audio,
+    store_asset_from_data_uri,
+    get_audio,
     SPEED_OF_SOUND,
     EPS,
 )
+from .stft_engine import frame_block, count_frames, stream_spectrogram
+from .resampler import RESAMPLER_PRESETS, DEFAULT_QUALITY, resample_positions, doppler_position_blocks
+from .doppler_scene import (
+    parse_scene_source,
+    render_scene,
+    scene_summary,
+)
+from .doppler_estimator import estimate_doppler_parameters
+from .serializers import DopplerSceneSerializer
+from ..offload import spawn_pool
 
 try:
     import tensorflow as tf
@@ -31,6 +46,33 @@ REG_MODEL = None
 SPECTROGRAM_WIDTH = None
 MODEL_LOAD_ERROR = None
 
+RENDER_CACHE = OrderedDict() # Compact results only: summaries and float32 arrays
+RENDER_CACHE_SIZE = 32
+
+MEL_CACHE = OrderedDict()
+MEL_CACHE_SIZE = 16
+_cache_lock = threading.Lock() # Guards RENDER_CACHE and MEL_CACHE across request threads
+MEL_HOP_LENGTH = 512
+PREDICT_BATCH_SIZE = 64
+
+DOPPLER_SUMMARY_FIELDS = ('file_id', 'asset_id', 'sr', 'duration', 'status', 'observed', 'frequencies')
+DOPPLER_AUDIO_FIELDS = ('src', 'waveform', 'store', 'initial_waveform', 'spectrogram')
+
+SWEEP_MAX_VARIANTS = 256
+SWEEP_MAX_VARIANT_SECONDS = 3600 # Audio rendered per sweep: variants x clip duration
+SWEEP_CHUNK_VARIANTS = 8
+SWEEP_WORKERS = min(4, os.cpu_count() or 1)
+SWEEP_N_FFT = 2048
+SWEEP_HOP_LENGTH = 512
+_SWEEP_POOL = None
+
+def _reset_sweep_pool():
+    # The parent's pool and its management thread do not survive fork().
+    global _SWEEP_POOL
+    _SWEEP_POOL = None
+
+os.register_at_fork(after_in_child=_reset_sweep_pool)
+
 def _lazy_load_model():
     global REG_MODEL, SPECTROGRAM_WIDTH, MODEL_LOAD_ERROR
     if REG_MODEL is not None:
@@ -47,25 +89,30 @@ def _lazy_load_model():
             SPECTROGRAM_WIDTH = None
             MODEL_LOAD_ERROR = str(e)
 
-def apply_doppler_effect(audio, sr, v_start, v_end):
+def doppler_cutoff(v_start, v_end):
+    # Read positions are normalised to the clip, so the read rate peaks at
+    # max(factor) / mean(factor). Lower the kernel cutoff by that much so the
+    # compressed stretch does not alias.
+    f_start, f_end = (SPEED_OF_SOUND / (SPEED_OF_SOUND - v + EPS) for v in (v_start, v_end))
+    if v_end == v_start:
+        return 1.0
+    mean_factor = SPEED_OF_SOUND / (v_end - v_start) * np.log(
+        (SPEED_OF_SOUND - v_start + EPS) / (SPEED_OF_SOUND - v_end + EPS)
+    )
+    return float(min(1.0, mean_factor / max(f_start, f_end)))
+
+def apply_doppler_effect(audio, sr, v_start, v_end, quality=DEFAULT_QUALITY):
     n_samples = len(audio)
     if n_samples == 0:
         return audio.astype(np.float32)
     
-    v = np.linspace(v_start, v_end, n_samples)
-    doppler_factor = SPEED_OF_SOUND / (SPEED_OF_SOUND - v + EPS)
-    indices = np.cumsum(doppler_factor)
+    positions = doppler_position_blocks(n_samples, v_start, v_end, SPEED_OF_SOUND, EPS)
+    doppler_audio = resample_positions(
+        audio, positions, n_samples, quality=quality, cutoff=doppler_cutoff(v_start, v_end)
+    )
+    doppler_audio /= np.max(np.abs(doppler_audio)) + EPS
     
-    if indices[-1] - indices[0] == 0:
-        indices_normalized = np.linspace(0, n_samples - 1, n_samples)
-    else:
-        indices_normalized = (indices - indices[0]) / (indices[-1] - indices[0]) * (n_samples - 1)
-    
-    doppler_audio = np.interp(indices_normalized, np.arange(n_samples), audio)
-    maxv = np.max(np.abs(doppler_audio)) + EPS
-    doppler_audio = doppler_audio / maxv
-    
-    return doppler_audio.astype(np.float32)
+    return doppler_audio
 
 def linear_envelope(length, start_level=0.0, end_level=1.0):
     if length <= 0:
@@ -86,6 +133,163 @@ def compute_observed_frequencies(f_source, v_start, v_end):
     f_obs_end = f_source * (SPEED_OF_SOUND / (SPEED_OF_SOUND - v_end + EPS))
     return f_obs_start, f_obs_end
 
+def _sweep_pool():
+    global _SWEEP_POOL
+    if _SWEEP_POOL is None:
+        # spawn, as for the offload pool: forking a threaded server is unsafe
+        _SWEEP_POOL = spawn_pool(SWEEP_WORKERS)
+    return _SWEEP_POOL
+
+def peak_frequency_tracks(batch, sr, n_fft=SWEEP_N_FFT, hop_length=SWEEP_HOP_LENGTH):
+    n_frames = count_frames(batch.shape[1], hop_length)
+    window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    peaks = np.empty((batch.shape[0], n_frames), dtype=np.float64)
+    
+    for k, row in enumerate(batch):
+        magnitude = np.abs(sp_fft.rfft(frame_block(row, 0, n_frames, n_fft, hop_length) * window, axis=1))
+        peak_bins = np.argmax(magnitude[:, 1:], axis=1) + 1
+        peaks[k] = np.where(magnitude.max(axis=1) > EPS, freqs[peak_bins], np.nan)
+    
+    times = np.arange(n_frames) * hop_length / sr
+    return times, peaks
+
+def sweep_tracks(samples, sr, velocity_pairs, max_points, quality=DEFAULT_QUALITY):
+    # Renders one variant at a time with the same resampler as generate, so a
+    # preview matches the clip it stands for and only one variant is in memory.
+    results = []
+    for v_start, v_end in velocity_pairs:
+        rendered = apply_doppler_effect(samples, sr, v_start, v_end, quality=quality)
+        times, peaks = peak_frequency_tracks(rendered[np.newaxis, :], sr)
+        track = peaks[0]
+        step = max(1, len(times) // max_points)
+        finite = track[np.isfinite(track)]
+        results.append({
+            'v_start': float(v_start),
+            'v_end': float(v_end),
+            'peak_track': {
+                'time': times[::step].tolist(),
+                'frequency': np.where(np.isnan(track), None, track)[::step].tolist(),
+            },
+            'mean_peak_frequency': float(finite.mean()) if finite.size else None,
+        })
+    return results
+
+def sweep_chunk(asset_id, velocity_pairs, max_points, quality=DEFAULT_QUALITY):
+    # Pool workers map the clip from the signal store instead of receiving a pickled copy.
+    stored = get_audio(asset_id)
+    if stored is None:
+        raise LookupError(f'Asset {asset_id} not found or expired')
+    samples = np.asarray(stored['samples'], dtype=np.float32)
+    return sweep_tracks(samples, stored['sr'], velocity_pairs, max_points, quality)
+
+def run_doppler_sweep(asset_id, velocity_pairs, max_points=500, quality=DEFAULT_QUALITY):
+    chunks = [
+        velocity_pairs[i:i + SWEEP_CHUNK_VARIANTS]
+        for i in range(0, len(velocity_pairs), SWEEP_CHUNK_VARIANTS)
+    ]
+    if len(chunks) == 1:
+        return sweep_chunk(asset_id, chunks[0], max_points, quality)
+    
+    pool = _sweep_pool()
+    futures = [pool.submit(sweep_chunk, asset_id, chunk, max_points, quality) for chunk in chunks]
+    return [result for future in futures for result in future.result()]
+
+def resolve_asset(data):
+    asset_id = data.get('asset_id')
+    if asset_id:
+        return asset_id if get_audio(asset_id) is not None else None
+    contents = data.get('contents')
+    if contents:
+        return store_asset_from_data_uri(contents)
+    return None
+
+def asset_error_response(data):
+    if data.get('asset_id'):
+        return Response({'error': 'Asset not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'error': 'asset_id or contents (data URI) is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+def render_is_live(result):
+    # A cached summary points at rendered audio in the signal store, which may have
+    # evicted it since; such a summary is rendered again.
+    file_id = result.get('file_id') if isinstance(result, dict) else None
+    return file_id is None or get_audio(file_id) is not None
+
+def cached_render(key, render):
+    with _cache_lock:
+        result = RENDER_CACHE.get(key)
+        if result is not None:
+            RENDER_CACHE.move_to_end(key)
+    if result is not None and render_is_live(result):
+        return result
+    result = render()
+    with _cache_lock:
+        RENDER_CACHE[key] = result
+        RENDER_CACHE.move_to_end(key)
+        if len(RENDER_CACHE) > RENDER_CACHE_SIZE:
+            RENDER_CACHE.popitem(last=False)
+    return result
+
+def compact_spectrogram(samples, sr):
+    # Kept as float32 arrays; the JSON lists are several times larger, so they are
+    # built per response instead of cached.
+    spectrogram = compute_spectrogram(samples, sr)
+    if spectrogram is None:
+        return None
+    return {axis: np.asarray(values, dtype=np.float32) for axis, values in spectrogram.items()}
+
+def parse_field_list(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return [name.strip() for name in value if name and name.strip()]
+
+def select_fields(data):
+    # No selector keeps the full legacy payload. fields= picks exactly what is
+    # returned; expand= adds audio-derived parts on top of the summary fields.
+    fields = parse_field_list(data.get('fields'))
+    expand = parse_field_list(data.get('expand'))
+    if fields is None and expand is None:
+        return list(DOPPLER_SUMMARY_FIELDS + DOPPLER_AUDIO_FIELDS)
+    selected = fields if fields is not None else list(DOPPLER_SUMMARY_FIELDS)
+    selected += [name for name in expand or [] if name not in selected]
+    unknown = [name for name in selected if name not in DOPPLER_SUMMARY_FIELDS + DOPPLER_AUDIO_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {unknown}')
+    return selected
+
+def audio_parts(request, file_id, names):
+    stored = get_audio(file_id)
+    if stored is None:
+        raise LookupError(f'Audio {file_id} not found or expired')
+    samples, sr = stored['samples'], stored['sr']
+    parts = {}
+    if 'src' in names:
+        parts['src'] = audio_url(request, file_id)
+    if 'waveform' in names:
+        parts['waveform'] = make_waveform(stored)
+    if 'store' in names:
+        parts['store'] = {'sr': sr, 'samples': samples.tolist(), 'duration': stored['duration']}
+    if 'initial_waveform' in names:
+        # Cheap to rebuild from the stored samples, and far too large to cache
+        parts['initial_waveform'] = {
+            'time': np.linspace(0, len(samples) / sr, len(samples)).tolist(),
+            'amplitude': np.asarray(samples).tolist(),
+            'sr': int(sr),
+        }
+    if 'spectrogram' in names:
+        spectrogram = cached_render(('spectrogram', file_id), lambda: compact_spectrogram(samples, sr))
+        parts['spectrogram'] = None if spectrogram is None else {
+            axis: values.tolist() for axis, values in spectrogram.items()
+        }
+    return parts
+
+def doppler_response(request, summary, fields):
+    parts = audio_parts(request, summary['file_id'], [name for name in fields if name in DOPPLER_AUDIO_FIELDS])
+    merged = {**summary, **parts}
+    return {name: merged[name] for name in fields if name in merged}
+
 @api_view(['POST'])
 @parser_classes([MultiPartParser, FormParser, JSONParser])
 def upload_doppler(request):
@@ -100,138 +304,306 @@ def upload_doppler(request):
                 return Response({'error': 'No audio provided'}, status=status.HTTP_400_BAD_REQUEST)
             src = contents
         
-        store = parse_wav_from_data_uri(src)
-        store['samples'] = store['samples'].tolist()
-        fig = make_waveform(store)
+        asset_id = store_asset_from_data_uri(src)
+        stored = get_audio(asset_id)
+        fig = make_waveform(stored)
         
-        return Response({'store': store, 'src': src, 'waveform': fig})
+        store = {'sr': stored['sr'], 'samples': stored['samples'].tolist(), 'duration': stored['duration']}
+        return Response({'store': store, 'src': audio_url(request, asset_id), 'waveform': fig, 'asset_id': asset_id, 'file_id': asset_id})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def render_generate(asset_id, v_start, v_end, f_source, quality=DEFAULT_QUALITY):
+    stored = get_audio(asset_id)
+    sr = stored['sr']
+    samples = np.asarray(stored['samples'], dtype=np.float32)
+    
+    doppler_out = apply_doppler_effect(samples, sr, v_start, v_end, quality=quality)
+    
+    if v_end > v_start:
+        env = linear_envelope(len(doppler_out), start_level=0.2, end_level=1.0)
+    else:
+        env = linear_envelope(len(doppler_out), start_level=1.0, end_level=0.2)
+    doppler_out = apply_amplitude_envelope(doppler_out, env)
+    
+    file_id = store_audio(doppler_out, sr, normalize=True)
+    
+    status_msg = f"Doppler applied across full clip: v_i={v_start} m/s → v_f={v_end} m/s"
+    freq_msg = ''
+    if f_source is not None:
+        f_obs_start, f_obs_end = compute_observed_frequencies(f_source, v_start, v_end)
+        freq_msg = f"Observed Frequency: start={f_obs_start:.1f} Hz → end={f_obs_end:.1f} Hz"
+    
+    return {
+        'file_id': file_id,
+        'asset_id': asset_id,
+        'sr': sr,
+        'duration': len(doppler_out) / sr,
+        'status': status_msg,
+        'observed': freq_msg
+    }
+
 @api_view(['POST'])
 @parser_classes([JSONParser])
 def generate_doppler(request):
     try:
-        contents = request.data.get('contents')
         v_start = float(request.data.get('v_start'))
         v_end = float(request.data.get('v_end'))
         f_source = float(request.data.get('f_source')) if request.data.get('f_source') is not None else None
+        quality = request.data.get('quality', DEFAULT_QUALITY)
+        if quality not in RESAMPLER_PRESETS:
+            return Response({'error': f'quality must be one of {list(RESAMPLER_PRESETS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = select_fields(request.data)
         
-        if not contents:
-            return Response({'error': 'contents (data URI) is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        parsed = parse_wav_from_data_uri(contents)
-        sr = parsed['sr']
-        samples = np.array(parsed['samples'], dtype=np.float32)
+        asset_id = resolve_asset(request.data)
+        if asset_id is None:
+            return asset_error_response(request.data)
         
-        doppler_out = apply_doppler_effect(samples, sr, v_start, v_end)
-        
-        if v_end > v_start:
-            env = linear_envelope(len(doppler_out), start_level=0.2, end_level=1.0)
-        else:
-            env = linear_envelope(len(doppler_out), start_level=1.0, end_level=0.2)
-        doppler_out = apply_amplitude_envelope(doppler_out, env)
-        
-        src = write_wav_data_uri(doppler_out, sr)
-        file_id = store_audio(doppler_out, sr)
-        initial_waveform, spectrogram = compute_full_analysis(doppler_out, sr)
-        
-        status_msg = f"Doppler applied across full clip: v_i={v_start} m/s → v_f={v_end} m/s"
-        freq_msg = ''
-        if f_source is not None:
-            f_obs_start, f_obs_end = compute_observed_frequencies(f_source, v_start, v_end)
-            freq_msg = f"Observed Frequency: start={f_obs_start:.1f} Hz → end={f_obs_end:.1f} Hz"
-        
-        return Response({
-            'src': src,
-            'initial_waveform': initial_waveform,
-            'spectrogram': spectrogram,
-            'file_id': file_id,
-            'status': status_msg,
-            'observed': freq_msg
-        })
+        summary = cached_render(
+            ('generate', asset_id, v_start, v_end, f_source, quality),
+            lambda: render_generate(asset_id, v_start, v_end, f_source, quality)
+        )
+        return Response(doppler_response(request, summary, fields))
     except Exception as e:
         import traceback
         traceback.print_exc()
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def render_simulation(asset_id, v_start, v_end, f_source, quality=DEFAULT_QUALITY):
+    stored = get_audio(asset_id)
+    sr = stored['sr']
+    samples = np.asarray(stored['samples'], dtype=np.float32)
+    n = len(samples)
+    
+    mid = n // 2
+    segA = samples[:mid].astype(np.float32)
+    segB = samples[mid:].astype(np.float32)
+    
+    approach = apply_doppler_effect(segA, sr, v_start, v_end, quality=quality)
+    if v_end > v_start:
+        envA = linear_envelope(len(approach), start_level=0.2, end_level=1.0)
+    else:
+        envA = linear_envelope(len(approach), start_level=1.0, end_level=0.2)
+    approach = apply_amplitude_envelope(approach, envA)
+    
+    v_end_val = v_end
+    if v_end_val >= 0:
+        v_rec_start = v_end_val
+        v_rec_end = v_end_val + 5.0
+    else:
+        v_rec_start = abs(v_end_val)
+        v_rec_end = abs(v_end_val) + 5.0
+    
+    recede = apply_doppler_effect(segB, sr, v_rec_start, v_rec_end, quality=quality)
+    envB = linear_envelope(len(recede), start_level=1.0, end_level=0.12)
+    recede = apply_amplitude_envelope(recede, envB)
+    
+    simulation = np.concatenate([approach, recede]).astype(np.float32)
+    max_val = np.max(np.abs(simulation)) + EPS
+    simulation = simulation / max_val if max_val > 0 else simulation
+    
+    file_id = store_audio(simulation, sr, normalize=True)
+    
+    status_msg = f"Car passing simulation: v_i={v_start} m/s → v_f={v_end} m/s"
+    freq_msg = ''
+    if f_source is not None:
+        f_obs_start, f_obs_end_accel = compute_observed_frequencies(f_source, v_start, v_end)
+        f_obs_recede = f_source * (SPEED_OF_SOUND / (SPEED_OF_SOUND + v_rec_end + EPS))
+        freq_msg = (
+            f"Start obs freq: {f_obs_start:.1f} Hz · End of accel: {f_obs_end_accel:.1f} Hz · "
+            f"Receding approx: {f_obs_recede:.1f} Hz"
+        )
+    
+    return {
+        'frequencies': freq_msg,
+        'file_id': file_id,
+        'asset_id': asset_id,
+        'sr': sr,
+        'duration': len(simulation) / sr,
+        'status': status_msg,
+        'observed': freq_msg
+    }
+
 @api_view(['POST'])
 @parser_classes([JSONParser])
 def simulate_passing(request):
     try:
-        contents = request.data.get('contents')
         v_start = float(request.data.get('v_start'))
         v_end = float(request.data.get('v_end'))
         f_source = float(request.data.get('f_source')) if request.data.get('f_source') is not None else None
+        quality = request.data.get('quality', DEFAULT_QUALITY)
+        if quality not in RESAMPLER_PRESETS:
+            return Response({'error': f'quality must be one of {list(RESAMPLER_PRESETS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = select_fields(request.data)
         
-        if not contents:
-            return Response({'error': 'contents (data URI) is required'}, status=status.HTTP_400_BAD_REQUEST)
+        asset_id = resolve_asset(request.data)
+        if asset_id is None:
+            return asset_error_response(request.data)
         
-        parsed = parse_wav_from_data_uri(contents)
-        sr = parsed['sr']
-        samples = np.array(parsed['samples'], dtype=np.float32)
-        n = len(samples)
-        
-        if n == 0:
+        if len(get_audio(asset_id)['samples']) == 0:
             return Response({'error': 'audio has no samples'}, status=status.HTTP_400_BAD_REQUEST)
         
-        mid = n // 2
-        segA = samples[:mid].astype(np.float32)
-        segB = samples[mid:].astype(np.float32)
+        summary = cached_render(
+            ('simulate', asset_id, v_start, v_end, f_source, quality),
+            lambda: render_simulation(asset_id, v_start, v_end, f_source, quality)
+        )
+        return Response(doppler_response(request, summary, fields))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def doppler_result_parts(request):
+    try:
+        file_id = request.query_params.get('file_id')
+        if not file_id:
+            return Response({'error': 'file_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        stored = get_audio(file_id)
+        if stored is None:
+            return Response({'error': 'Result not found or expired'}, status=status.HTTP_404_NOT_FOUND)
         
-        approach = apply_doppler_effect(segA, sr, v_start, v_end)
-        if v_end > v_start:
-            envA = linear_envelope(len(approach), start_level=0.2, end_level=1.0)
-        else:
-            envA = linear_envelope(len(approach), start_level=1.0, end_level=0.2)
-        approach = apply_amplitude_envelope(approach, envA)
+        fields = parse_field_list(request.query_params.get('fields')) or list(DOPPLER_AUDIO_FIELDS)
+        unknown = [name for name in fields if name not in DOPPLER_AUDIO_FIELDS]
+        if unknown:
+            return Response({'error': f'Unknown fields: {unknown}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        v_end_val = v_end
-        if v_end_val >= 0:
-            v_rec_start = v_end_val
-            v_rec_end = v_end_val + 5.0
-        else:
-            v_rec_start = abs(v_end_val)
-            v_rec_end = abs(v_end_val) + 5.0
+        return Response({
+            'file_id': file_id,
+            'sr': stored['sr'],
+            'duration': stored['duration'],
+            **audio_parts(request, file_id, fields),
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@parser_classes([JSONParser])
+def sweep_doppler(request):
+    try:
+        velocities = request.data.get('velocities')
+        f_sources = request.data.get('f_sources') or []
+        max_points = int(request.data.get('max_points', 500))
+        quality = request.data.get('quality', DEFAULT_QUALITY)
+        if quality not in RESAMPLER_PRESETS:
+            return Response({'error': f'quality must be one of {list(RESAMPLER_PRESETS)}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        recede = apply_doppler_effect(segB, sr, v_rec_start, v_rec_end)
-        envB = linear_envelope(len(recede), start_level=1.0, end_level=0.12)
-        recede = apply_amplitude_envelope(recede, envB)
+        if not velocities:
+            return Response({'error': 'velocities ([v_start, v_end] pairs) is required'}, status=status.HTTP_400_BAD_REQUEST)
+        velocity_pairs = [(float(v_start), float(v_end)) for v_start, v_end in velocities]
+        f_sources = [float(f) for f in f_sources]
+        if len(velocity_pairs) * max(1, len(f_sources)) > SWEEP_MAX_VARIANTS:
+            return Response({'error': f'Sweep is limited to {SWEEP_MAX_VARIANTS} variants'}, status=status.HTTP_400_BAD_REQUEST)
         
-        simulation = np.concatenate([approach, recede]).astype(np.float32)
-        max_val = np.max(np.abs(simulation)) + EPS
-        simulation = simulation / max_val if max_val > 0 else simulation
+        asset_id = resolve_asset(request.data)
+        if asset_id is None:
+            return asset_error_response(request.data)
+        stored = get_audio(asset_id)
+        if len(stored['samples']) == 0:
+            return Response({'error': 'audio has no samples'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(velocity_pairs) * stored['duration'] > SWEEP_MAX_VARIANT_SECONDS:
+            return Response({'error': f'Sweep is limited to {SWEEP_MAX_VARIANT_SECONDS} s of audio '
+                                      f'(variants x clip duration); use fewer variants or a shorter clip'},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        src = write_wav_data_uri(simulation, sr)
-        store = {'sr': sr, 'samples': simulation.tolist(), 'duration': len(simulation) / sr}
-        fig = make_waveform(store)
-        file_id = store_audio(simulation, sr)
-        initial_waveform, spectrogram = compute_full_analysis(simulation, sr)
+        tracks = run_doppler_sweep(asset_id, velocity_pairs, max(1, max_points), quality)
         
-        status_msg = f"Car passing simulation: v_i={v_start} m/s → v_f={v_end} m/s"
-        freq_msg = ''
-        if f_source is not None:
-            f_obs_start, f_obs_end_accel = compute_observed_frequencies(f_source, v_start, v_end)
-            f_obs_recede = f_source * (SPEED_OF_SOUND / (SPEED_OF_SOUND + v_rec_end + EPS))
-            freq_msg = (
-                f"Start obs freq: {f_obs_start:.1f} Hz · End of accel: {f_obs_end_accel:.1f} Hz · "
-                f"Receding approx: {f_obs_recede:.1f} Hz"
-            )
+        variants = []
+        for track in tracks:
+            if not f_sources:
+                variants.append(track)
+            for f_source in f_sources:
+                f_obs_start, f_obs_end = compute_observed_frequencies(f_source, track['v_start'], track['v_end'])
+                variants.append({
+                    **track,
+                    'f_source': f_source,
+                    'observed': {'start': f_obs_start, 'end': f_obs_end},
+                })
+        
+        return Response({'asset_id': asset_id, 'sr': stored['sr'], 'variants': variants})
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@parser_classes([JSONParser])
+def simulate_scene(request):
+    try:
+        serializer = DopplerSceneSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        duration = serializer.validated_data['duration']
+        sr = serializer.validated_data['sr']
+        quality = serializer.validated_data['quality']
+        source_data = serializer.validated_data['sources']
+        
+        try:
+            sources = [parse_scene_source(data, duration) for data in source_data]
+        except LookupError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        
+        scene = render_scene(sources, duration, sr, quality=quality)
+        file_id = store_audio(scene, sr, normalize=True)
         
         return Response({
-            'store': store, 
-            'src': src, 
-            'waveform': fig, 
-            'frequencies': freq_msg,
-            'initial_waveform': initial_waveform,
-            'spectrogram': spectrogram,
+            'src': audio_url(request, file_id),
+            'waveform': make_waveform(get_audio(file_id)),
             'file_id': file_id,
-            'status': status_msg,
-            'observed': freq_msg
+            'sr': sr,
+            'duration': len(scene) / sr,
+            'sources': [scene_summary(source, duration) for source in sources],
         })
     except Exception as e:
+        import traceback
+        traceback.print_exc()
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def asset_mel_spectrogram(asset_id):
+    with _cache_lock:
+        if asset_id in MEL_CACHE:
+            MEL_CACHE.move_to_end(asset_id)
+            return MEL_CACHE[asset_id]
+    
+    stored = get_audio(asset_id)
+    waveform = np.asarray(stored['samples'], dtype=np.float32)
+    if stored['sr'] != SAMPLE_RATE:
+        waveform = librosa.resample(waveform, orig_sr=stored['sr'], target_sr=SAMPLE_RATE)
+    
+    S_dB, _ = stream_spectrogram(waveform, SAMPLE_RATE, n_mels=128, fmax=8000)
+    with _cache_lock:
+        MEL_CACHE[asset_id] = S_dB
+        if len(MEL_CACHE) > MEL_CACHE_SIZE:
+            MEL_CACHE.popitem(last=False)
+    return S_dB
+
+def fit_spectrogram_width(S_dB):
+    current_width = S_dB.shape[1]
+    if current_width < SPECTROGRAM_WIDTH:
+        padding = SPECTROGRAM_WIDTH - current_width
+        return np.pad(S_dB, ((0, 0), (0, padding)), mode='constant')
+    return S_dB[:, :SPECTROGRAM_WIDTH]
+
+def predict_doppler_trajectory(S_dB, hop):
+    if S_dB.shape[1] <= SPECTROGRAM_WIDTH:
+        windows = fit_spectrogram_width(S_dB)[np.newaxis, ...]
+    else:
+        # (n_mels, n_windows, width) view over the cached spectrogram; no copy until predict
+        windows = np.lib.stride_tricks.sliding_window_view(S_dB, SPECTROGRAM_WIDTH, axis=1)[:, ::hop]
+        windows = windows.transpose(1, 0, 2)
+    
+    predictions = REG_MODEL.predict(windows[..., np.newaxis], batch_size=PREDICT_BATCH_SIZE, verbose=0)
+    frame_seconds = MEL_HOP_LENGTH / SAMPLE_RATE
+    starts = np.arange(len(predictions)) * hop
+    
+    return {
+        'hop': hop,
+        'window_seconds': SPECTROGRAM_WIDTH * frame_seconds,
+        'time_start': (starts * frame_seconds).tolist(),
+        'time_end': ((starts + SPECTROGRAM_WIDTH) * frame_seconds).tolist(),
+        'predicted_start_speed': predictions[:, 0].astype(float).tolist(),
+        'predicted_end_speed': predictions[:, 1].astype(float).tolist(),
+        'predicted_source_frequency': predictions[:, 2].astype(float).tolist(),
+    }
+
 @api_view(['POST'])
 @parser_classes([JSONParser])
 def predict_doppler(request):
@@ -254,34 +626,59 @@ def predict_doppler(request):
                 'load_error': MODEL_LOAD_ERROR,
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        contents = request.data.get('contents')
-        if not contents:
-            return Response({'error': 'contents (data URI) is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        parsed = parse_wav_from_data_uri(contents)
-        waveform = parsed['samples']
-        original_sr = parsed['sr']
-        
-        if original_sr != SAMPLE_RATE:
-            waveform = librosa.resample(waveform, orig_sr=original_sr, target_sr=SAMPLE_RATE)
+        asset_id = resolve_asset(request.data)
+        if asset_id is None:
+            return asset_error_response(request.data)
         
-        S = librosa.feature.melspectrogram(y=waveform, sr=SAMPLE_RATE, n_mels=128, fmax=8000)
-        S_dB = librosa.power_to_db(S, ref=np.max)
+        S_dB = asset_mel_spectrogram(asset_id)
         
-        current_width = S_dB.shape[1]
-        if current_width < SPECTROGRAM_WIDTH:
-            padding = SPECTROGRAM_WIDTH - current_width
-            S_dB_padded = np.pad(S_dB, ((0, 0), (0, padding)), mode='constant')
-        else:
-            S_dB_padded = S_dB[:, :SPECTROGRAM_WIDTH]
+        if request.data.get('mode', 'single') == 'windowed':
+            hop = int(request.data.get('hop', max(1, SPECTROGRAM_WIDTH // 2)))
+            if hop <= 0:
+                return Response({'error': 'hop must be a positive number of frames'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'asset_id': asset_id, **predict_doppler_trajectory(S_dB, hop)})
         
-        processed_spec = S_dB_padded[np.newaxis, ..., np.newaxis]
+        processed_spec = fit_spectrogram_width(S_dB)[np.newaxis, ..., np.newaxis]
         pred_start, pred_end, pred_freq = REG_MODEL.predict(processed_spec)[0]
         
-        return Response({
+        result = {
             'predicted_start_speed': float(pred_start),
             'predicted_end_speed': float(pred_end),
             'predicted_source_frequency': float(pred_freq),
+        }
+        if request.data.get('cross_check'):
+            stored = get_audio(asset_id)
+            analytic = estimate_doppler_parameters(stored['samples'], stored['sr'])
+            analytic.pop('ridge')
+            result['analytic'] = analytic
+        return Response(result)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@parser_classes([JSONParser])
+def estimate_doppler(request):
+    try:
+        f_source = request.data.get('f_source')
+        max_points = int(request.data.get('max_points', 500))
+        
+        asset_id = resolve_asset(request.data)
+        if asset_id is None:
+            return asset_error_response(request.data)
+        stored = get_audio(asset_id)
+        
+        estimate = estimate_doppler_parameters(
+            stored['samples'],
+            stored['sr'],
+            f_source=float(f_source) if f_source is not None else None,
+            max_points=max(1, max_points),
+        )
+        f_obs_start, f_obs_end = compute_observed_frequencies(estimate['f_source'], estimate['v_start'], estimate['v_end'])
+        
+        return Response({
+            'asset_id': asset_id,
+            **estimate,
+            'observed': {'start': f_obs_start, 'end': f_obs_end},
         })
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
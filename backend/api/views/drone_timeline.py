@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import torch
+
+TIMELINE_WINDOW_SECONDS = 5.0
+TIMELINE_HOP_SECONDS = 2.5
+TIMELINE_BATCH_SIZE = 16
+DRONE_THRESHOLD = 0.5
+INFERENCE_THREADS = int(os.environ.get('DRONE_INFERENCE_THREADS', os.cpu_count() or 1))
+
+def configure_inference_threads(threads=INFERENCE_THREADS):
+    # Intra-op threads are process-wide, so set them once at model load rather than per request.
+    torch.set_num_threads(max(1, threads))
+
+def drone_class_index(model):
+    labels = {int(i): str(label).lower() for i, label in model.config.id2label.items()}
+    for i, label in labels.items():
+        if label == 'drone':
+            return i
+    for i, label in labels.items():
+        if 'drone' in label and not label.startswith(('no', 'non', 'not')):
+            return i
+    raise ValueError(f'Model has no drone label: {list(labels.values())}')
+
+def window_starts(n_samples, window, hop):
+    if n_samples <= window:
+        return np.array([0])
+    starts = np.arange(0, n_samples - window + 1, hop)
+    if starts[-1] + window < n_samples:
+        starts = np.append(starts, n_samples - window)
+    return starts
+
+def sliding_windows(y, window, hop):
+    y = np.asarray(y, dtype=np.float32)
+    if len(y) < window:
+        y = np.pad(y, (0, window - len(y)))
+    starts = window_starts(len(y), window, hop)
+    return starts, np.lib.stride_tricks.sliding_window_view(y, window)[starts]
+
+def drone_probabilities(model, feature_extractor, windows, sr, batch_size=TIMELINE_BATCH_SIZE, on_batch=None):
+    # Features are extracted per batch so a long recording never holds every
+    # window's filterbank in memory at once.
+    drone_index = drone_class_index(model)
+    probabilities = np.empty(len(windows), dtype=np.float32)
+    with torch.inference_mode():
+        for b0 in range(0, len(windows), batch_size):
+            batch = list(windows[b0:b0 + batch_size])
+            inputs = feature_extractor(batch, sampling_rate=sr, return_tensors="pt")
+            logits = model(**inputs).logits
+            probabilities[b0:b0 + len(batch)] = torch.softmax(logits, dim=1)[:, drone_index].numpy()
+            if on_batch is not None:
+                on_batch(b0 + len(batch), probabilities[:b0 + len(batch)])
+    return probabilities
+
+def detected_segments(starts, probabilities, window, sr, threshold=DRONE_THRESHOLD):
+    segments = []
+    for start, probability in zip(starts, probabilities):
+        if probability < threshold:
+            continue
+        t0, t1 = float(start / sr), float((start + window) / sr)
+        if segments and t0 <= segments[-1]['end']:
+            segments[-1]['end'] = t1
+            segments[-1]['max_probability'] = max(segments[-1]['max_probability'], float(probability))
+        else:
+            segments.append({'start': t0, 'end': t1, 'max_probability': float(probability)})
+    return segments
+
+def timeline_label(model, segments):
+    drone_index = drone_class_index(model)
+    if segments:
+        return model.config.id2label[drone_index].upper()
+    others = [label for i, label in model.config.id2label.items() if int(i) != drone_index]
+    return others[0].upper() if others else 'NO DRONE'
+
+def scan_drone_timeline(model, feature_extractor, y, sr, window_seconds=TIMELINE_WINDOW_SECONDS,
+                        hop_seconds=TIMELINE_HOP_SECONDS, threshold=DRONE_THRESHOLD,
+                        batch_size=TIMELINE_BATCH_SIZE, on_progress=None):
+    window = max(1, int(window_seconds * sr))
+    hop = max(1, int(hop_seconds * sr))
+    starts, windows = sliding_windows(y, window, hop)
+
+    def on_batch(done, scored):
+        # Reports the timeline scored so far, so pollers can draw it as it fills in.
+        on_progress(done / len(windows), {
+            'start': (starts[:done] / sr).tolist(),
+            'probability': scored.tolist(),
+            'segments': detected_segments(starts[:done], scored, window, sr, threshold),
+        })
+
+    probabilities = drone_probabilities(model, feature_extractor, windows, sr, batch_size,
+                                        on_batch=on_batch if on_progress is not None else None)
+    segments = detected_segments(starts, probabilities, window, sr, threshold)
+    return {
+        'prediction': timeline_label(model, segments),
+        'window_seconds': window / sr,
+        'hop_seconds': hop / sr,
+        'threshold': threshold,
+        'timeline': {
+            'start': (starts / sr).tolist(),
+            'probability': probabilities.tolist(),
+        },
+        'segments': segments,
+    }
@@ -2,33 +2,46 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.http import StreamingHttpResponse
 import numpy as np
+import json
 import torch
 from transformers import AutoFeatureExtractor, AutoModelForAudioClassification
 import os
-import uuid
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 
 from .audio import (
     AUDIO_STORAGE, 
-    load_audio_file, 
+    get_or_load_audio,
     compute_spectrogram,
     generate_waveform_chunk,
+    generate_waveform_frames,
     compute_frequency_over_time,
-    get_original_sample_rate,
     get_next_chunk_position,
     is_chunk_complete,
 )
+from .pitch_engine import iter_frequency_over_time
+from .audio_decode import decode_upload
+from ..quantization import prepare_inference_model, model_precision
+from ..preload import run_after_fork
+from .drone_timeline import (
+    configure_inference_threads,
+    scan_drone_timeline,
+    TIMELINE_WINDOW_SECONDS,
+    TIMELINE_HOP_SECONDS,
+    TIMELINE_BATCH_SIZE,
+    DRONE_THRESHOLD,
+)
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'drone_model')
 feature_extractor, model = None, None
 
 try:
     feature_extractor = AutoFeatureExtractor.from_pretrained(MODEL_PATH)
-    model = AutoModelForAudioClassification.from_pretrained(MODEL_PATH)
-    model.eval()
-    print("✅ Drone detection model loaded successfully")
+    model = prepare_inference_model(AutoModelForAudioClassification.from_pretrained(MODEL_PATH))
+    run_after_fork(configure_inference_threads)
+    print(f"✅ Drone detection model loaded successfully ({model_precision(model)})")
 except Exception as e:
     print(f"❌ Error loading model: {e}")
 
@@ -60,15 +73,19 @@ class DroneDetectionView(APIView):
             return Response({'error': 'No audio file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            file_id = f"{uuid.uuid4()}{os.path.splitext(audio_file.name)[1]}"
-            fs = FileSystemStorage(location=settings.TEMP_FILE_ROOT)
-            temp_filename = fs.save(file_id, audio_file)
-            temp_filepath = fs.path(temp_filename)
+            MAX_DURATION = 5
+            timeline = request.data.get('mode') == 'timeline'
+            decoded = decode_upload(audio_file, sr=16000, duration=None if timeline else MAX_DURATION)
+            y, sr = decoded['samples'], decoded['sr']
+            original_sr = decoded['original_sr']
 
-            original_sr = get_original_sample_rate(temp_filepath)
+            # Content-addressed name: a repeat upload reuses the saved file and its caches.
+            file_id = f"{decoded['digest']}{os.path.splitext(audio_file.name)[1]}"
+            fs = FileSystemStorage(location=settings.TEMP_FILE_ROOT)
+            temp_filename = file_id if fs.exists(file_id) else fs.save(file_id, audio_file)
 
-            MAX_DURATION = 5
-            y, sr = load_audio_file(temp_filepath, sr=16000, mono=True, duration=MAX_DURATION)
+            if timeline:
+                return self._timeline_response(request, y, sr, temp_filename, original_sr)
 
             inputs = feature_extractor(y, sampling_rate=sr, return_tensors="pt")
             with torch.no_grad():
@@ -79,7 +96,7 @@ class DroneDetectionView(APIView):
 
             spectrogram_data = generate_drone_spectrogram(y, sr)
             initial_waveform = generate_waveform_chunk(y, sr, start_index=0)
-            freq_time_data = compute_frequency_over_time(y, sr)
+            freq_time_data = compute_frequency_over_time(y, sr, file_id=temp_filename)
 
             return Response({
                 'file_id': temp_filename,
@@ -95,27 +112,56 @@ class DroneDetectionView(APIView):
             traceback.print_exc()
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _timeline_response(self, request, y, sr, file_id, original_sr):
+        try:
+            window_seconds = float(request.data.get('window_seconds', TIMELINE_WINDOW_SECONDS))
+            hop_seconds = float(request.data.get('hop_seconds', TIMELINE_HOP_SECONDS))
+            threshold = float(request.data.get('threshold', DRONE_THRESHOLD))
+            batch_size = int(request.data.get('batch_size', TIMELINE_BATCH_SIZE))
+        except ValueError:
+            return Response({'error': 'Invalid timeline parameters'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_seconds <= 0 or hop_seconds <= 0 or batch_size <= 0:
+            return Response({'error': 'window_seconds, hop_seconds and batch_size must be positive'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        result = scan_drone_timeline(
+            model, feature_extractor, y, sr,
+            window_seconds=window_seconds,
+            hop_seconds=hop_seconds,
+            threshold=threshold,
+            batch_size=batch_size,
+        )
+        return Response({
+            'file_id': file_id,
+            'original_rate': int(original_sr),
+            'duration': len(y) / sr,
+            **result,
+        })
+
 class WaveformChunkView(APIView):
     parser_classes = (FormParser, MultiPartParser, JSONParser)
+    MAX_PREFETCH_FRAMES = 50
 
     def post(self, request):
         file_id = request.data.get('file_id')
-        position = int(request.data.get('position', 0))
+        try:
+            position = int(request.data.get('position', 0))
+            frames = int(request.data.get('frames', 1))
+        except (TypeError, ValueError):
+            return Response({'error': 'position and frames must be integers'}, status=status.HTTP_400_BAD_REQUEST)
         view_seconds = 2.0
 
+        frames = max(1, min(frames, self.MAX_PREFETCH_FRAMES))
+
         if not file_id:
             return Response({'error': 'No file_id provided'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            if file_id not in AUDIO_STORAGE:
-                fs = FileSystemStorage(location=settings.TEMP_FILE_ROOT)
-                if not fs.exists(file_id):
-                    return Response({'error': 'File not found or expired'}, status=status.HTTP_404_NOT_FOUND)
-                
-                print(f"Loading {file_id} from disk into memory cache...")
-                y, sr = load_audio_file(fs.path(file_id), sr=16000, mono=True, duration=None)
-                AUDIO_STORAGE[file_id] = {'samples': y, 'sr': sr}
+            if get_or_load_audio(file_id) is None:
+                return Response({'error': 'File not found or expired'}, status=status.HTTP_404_NOT_FOUND)
 
+            if frames > 1:
+                return self._handle_range_request(file_id, position, frames, view_seconds)
             return self._handle_chunk_request(file_id, position, view_seconds)
 
         except Exception as e:
@@ -139,4 +185,41 @@ class WaveformChunkView(APIView):
             'time': chunk_data['time'],
             'amplitude': chunk_data['amplitude'],
             'new_position': new_position,
-        })
\ No newline at end of file
+        })
+
+    def _handle_range_request(self, file_id, position, frames, view_seconds):
+        stored = AUDIO_STORAGE[file_id]
+        span = generate_waveform_frames(stored['samples'], stored['sr'], position, frames, view_seconds)
+
+        if span is None:
+            return Response({'completed': True})
+
+        return Response({'completed': False, **span})
+
+class FrequencyStreamView(APIView):
+
+    def get(self, request):
+        file_id = request.query_params.get('file_id')
+        try:
+            max_points = int(request.query_params.get('max_points', 2000))
+        except ValueError:
+            return Response({'error': 'max_points must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not file_id:
+            return Response({'error': 'No file_id provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            stored = get_or_load_audio(file_id)
+            if stored is None:
+                return Response({'error': 'File not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+
+            def stream():
+                for part in iter_frequency_over_time(stored['samples'], stored['sr'], max(1, max_points), file_id=file_id):
+                    yield json.dumps(part) + '\n'
+
+            return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4,6 +4,7 @@ from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 import numpy as np
 import json
+import hashlib
 
 from .serializers import (
     SignalUploadSerializer,
@@ -27,6 +28,8 @@ from ..utils import (  # Note: might be ..utils depending on your structure
     slice_window_with_wrap,
     apply_undersampling,  # NEW
 )
+from ..frames import SingleFlight
+from .graph_budget import GRAPH_COSTS, Stopwatch, plan_graph_quality, quality_report
 
 # These should be defined at module level in your views file
 PURPLE_COLORS = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#11998e', '#38ef7d',
@@ -35,6 +38,8 @@ PURPLE_COLORS = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#11998e', '#38ef7d
 EEG_LEAD_NAMES = [f'Ch {i + 1}' for i in range(19)]
 ECG_LEAD_NAMES = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
 
+GRAPH_FLIGHTS = SingleFlight()
+
 
 class EEGDemoView(APIView):
     def post(self, request):
@@ -192,16 +197,30 @@ class ECGWFDBUploadView(APIView):
             }, status=400)
 
 
-class EEGGraphView(APIView):
+class SignalGraphView(APIView):
+    # Identical concurrent frames (same body) are rendered once and shared.
+    # Superseded frames never get here; see api.frames.StaleFrameMiddleware.
     def post(self, request):
+        key = (type(self).__name__, hashlib.sha256(request.body).hexdigest())
+        data, code = GRAPH_FLIGHTS.do(key, lambda: self.render(request.data))
+        return Response(data, status=code)
+
+    def render(self, payload):
+        # Takes the parsed body rather than the request, so an offload worker can run it too.
+        raise NotImplementedError
+
+
+class EEGGraphView(SignalGraphView):
+    def render(self, payload):
+        clock = Stopwatch()
         try:
             print("=== EEG Graph Request ===")
-            print("Request data keys:", request.data.keys())
+            print("Request data keys:", payload.keys())
 
-            serializer = SignalGraphSerializer(data=request.data)
+            serializer = SignalGraphSerializer(data=payload)
             if not serializer.is_valid():
                 print("Serializer errors:", serializer.errors)
-                return Response(serializer.errors, status=400)
+                return serializer.errors, 400
 
             data = np.array(serializer.validated_data['data'])
             fs = serializer.validated_data['fs']
@@ -215,6 +234,7 @@ class EEGGraphView(APIView):
             rec_ch_x = serializer.validated_data.get('rec_ch_x', 0)
             rec_ch_y = serializer.validated_data.get('rec_ch_y', 1)
             undersample_freq = serializer.validated_data.get('undersample_freq', None)
+            budget_ms = serializer.validated_data.get('budget_ms', None)
 
             print(f"Data shape: {data.shape}, FS: {fs}, Viewer: {viewer_type}")
             print(f"Undersample freq: {undersample_freq}")
@@ -224,14 +244,29 @@ class EEGGraphView(APIView):
                 print(f"Applying undersampling from {fs}Hz to {undersample_freq}Hz")
                 data, fs = apply_undersampling(data, fs, undersample_freq)
                 print(f"After undersampling - Data shape: {data.shape}, New FS: {fs}")
-            # *** NEW: Run prediction on the (potentially) downsampled data ***
-            pred, conf = predict_eeg_abnormality(data)
-            status_text = EEG_ABNORMALITY_TYPES.get(pred, pred)
+            level, stage, units = plan_graph_quality(
+                budget_ms, clock, 'eeg', viewer_type, polar_mode, fs, position, zoom,
+                chunk_duration, channels, is_ecg=False
+            )
+            if level['predict']:
+                # *** NEW: Run prediction on the (potentially) downsampled data ***
+                predict_clock = Stopwatch()
+                pred, conf = predict_eeg_abnormality(data)
+                GRAPH_COSTS.record('predict-eeg', 1, predict_clock.elapsed_ms())
+                status_text = EEG_ABNORMALITY_TYPES.get(pred, pred)
+            else:
+                # Over budget: the prediction is the first thing dropped
+                pred, conf, status_text = None, None, None
             current_time = f"⏱️ {position:.2f}s / {data.shape[1] / fs:.2f}s"
 
+            # Traces are drawn from the decimated signal at the level's resolution
+            display = data[:, ::level['decimate']]
+            display_fs = fs / level['decimate']
+            render_clock = Stopwatch()
+
             if viewer_type == 'continuous':
                 traces = generate_continuous_graph_data(
-                    data, fs, position, channels, zoom, PURPLE_COLORS, EEG_LEAD_NAMES
+                    display, display_fs, position, channels, zoom, PURPLE_COLORS, EEG_LEAD_NAMES
                 )
                 layout = {
                     'title': '📈 Continuous Time Signal Viewer',
@@ -244,7 +279,7 @@ class EEGGraphView(APIView):
 
             elif viewer_type == 'xor':
                 traces = generate_xor_graph_data(
-                    data, fs, position, channels, chunk_duration, PURPLE_COLORS, EEG_LEAD_NAMES
+                    display, display_fs, position, channels, chunk_duration, PURPLE_COLORS, EEG_LEAD_NAMES
                 )
                 layout = {
                     'title': f'⚡ XOR Difference Graph (Chunk: {chunk_duration}s)',
@@ -257,7 +292,7 @@ class EEGGraphView(APIView):
 
             elif viewer_type == 'polar':
                 traces = generate_polar_graph_data(
-                    data, fs, position, channels, zoom, polar_mode, PURPLE_COLORS, EEG_LEAD_NAMES, is_ecg=False
+                    display, display_fs, position, channels, zoom, polar_mode, PURPLE_COLORS, EEG_LEAD_NAMES, is_ecg=False
                 )
                 layout = {
                     'title': f'🎯 Polar Graph ({polar_mode.capitalize()})',
@@ -267,7 +302,8 @@ class EEGGraphView(APIView):
 
             elif viewer_type == 'recurrence':
                 recurrence_data = generate_recurrence_graph_data(
-                    data, fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap
+                    display, display_fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap,
+                    bins=level['recurrence_bins']
                 )
                 if recurrence_data:
                     traces = [recurrence_data]
@@ -286,6 +322,7 @@ class EEGGraphView(APIView):
                 layout = {'title': 'Unknown viewer type'}
 
             print(f"Generated {len(traces)} traces")
+            GRAPH_COSTS.record(stage, units, render_clock.elapsed_ms())
 
             response_data = {
                 'traces': traces,
@@ -295,31 +332,33 @@ class EEGGraphView(APIView):
                 'prediction_label': pred,
                 'prediction_confidence': conf,
                 'prediction_status': status_text,
-                'new_fs': int(fs)
+                'new_fs': int(fs),
+                'quality': quality_report(level, budget_ms, clock),
             }
 
-            return Response(response_data)
+            return response_data, 200
 
         except Exception as e:
             import traceback
             print("=== ERROR in EEGGraphView ===")
             print(traceback.format_exc())
-            return Response({
+            return {
                 'error': str(e),
                 'success': False
-            }, status=400)
+            }, 400
 
 
-class ECGGraphView(APIView):
-    def post(self, request):
+class ECGGraphView(SignalGraphView):
+    def render(self, payload):
+        clock = Stopwatch()
         try:
             print("=== ECG Graph Request ===")
-            print("Request data keys:", request.data.keys())
+            print("Request data keys:", payload.keys())
 
-            serializer = SignalGraphSerializer(data=request.data)
+            serializer = SignalGraphSerializer(data=payload)
             if not serializer.is_valid():
                 print("Serializer errors:", serializer.errors)
-                return Response(serializer.errors, status=400)
+                return serializer.errors, 400
 
             data = np.array(serializer.validated_data['data'])
             fs = serializer.validated_data['fs']
@@ -333,6 +372,7 @@ class ECGGraphView(APIView):
             rec_ch_x = serializer.validated_data.get('rec_ch_x', 0)
             rec_ch_y = serializer.validated_data.get('rec_ch_y', 1)
             undersample_freq = serializer.validated_data.get('undersample_freq', None)
+            budget_ms = serializer.validated_data.get('budget_ms', None)
 
             print(f"Data shape: {data.shape}, FS: {fs}, Viewer: {viewer_type}")
             print(f"Polar mode: {polar_mode}, Undersample freq: {undersample_freq}")
@@ -343,14 +383,30 @@ class ECGGraphView(APIView):
                 data, fs = apply_undersampling(data, fs, undersample_freq)
                 print(f"After undersampling - Data shape: {data.shape}, New FS: {fs}")  
                 
-            pred, conf = predict_ecg_abnormality(data)
-            status_text = ECG_ABNORMALITY_TYPES.get(pred, pred)
+            level, stage, units = plan_graph_quality(
+                budget_ms, clock, 'ecg', viewer_type, polar_mode, fs, position, zoom,
+                chunk_duration, channels, is_ecg=True
+            )
+            if level['predict']:
+                # *** NEW: Run prediction on the (potentially) downsampled data ***
+                predict_clock = Stopwatch()
+                pred, conf = predict_ecg_abnormality(data)
+                GRAPH_COSTS.record('predict-ecg', 1, predict_clock.elapsed_ms())
+                status_text = ECG_ABNORMALITY_TYPES.get(pred, pred)
+            else:
+                # Over budget: the prediction is the first thing dropped
+                pred, conf, status_text = None, None, None
 
             current_time = f"⏱️ {position:.2f}s / {data.shape[1] / fs:.2f}s"
 
+            # Traces are drawn from the decimated signal at the level's resolution
+            display = data[:, ::level['decimate']]
+            display_fs = fs / level['decimate']
+            render_clock = Stopwatch()
+
             if viewer_type == 'continuous':
                 traces = generate_continuous_graph_data(
-                    data, fs, position, channels, zoom, PURPLE_COLORS, ECG_LEAD_NAMES
+                    display, display_fs, position, channels, zoom, PURPLE_COLORS, ECG_LEAD_NAMES
                 )
                 layout = {
                     'title': '📈 Continuous Time Signal Viewer (ECG)',
@@ -363,7 +419,7 @@ class ECGGraphView(APIView):
 
             elif viewer_type == 'xor':
                 traces = generate_xor_graph_data(
-                    data, fs, position, channels, chunk_duration, PURPLE_COLORS, ECG_LEAD_NAMES
+                    display, display_fs, position, channels, chunk_duration, PURPLE_COLORS, ECG_LEAD_NAMES
                 )
                 layout = {
                     'title': f'⚡ XOR Difference Graph (Chunk: {chunk_duration}s)',
@@ -377,7 +433,7 @@ class ECGGraphView(APIView):
             elif viewer_type == 'polar':
                 print(f"Generating polar graph - mode: {polar_mode}, is_ecg: True")
                 traces = generate_polar_graph_data(
-                    data, fs, position, channels, zoom, polar_mode, PURPLE_COLORS, ECG_LEAD_NAMES, is_ecg=True
+                    display, display_fs, position, channels, zoom, polar_mode, PURPLE_COLORS, ECG_LEAD_NAMES, is_ecg=True
                 )
                 mode_title = 'Cycles' if polar_mode == 'cycles' else polar_mode.capitalize()
                 layout = {
@@ -388,7 +444,8 @@ class ECGGraphView(APIView):
 
             elif viewer_type == 'recurrence':
                 recurrence_data = generate_recurrence_graph_data(
-                    data, fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap
+                    display, display_fs, position, channels, zoom, rec_ch_x, rec_ch_y, colormap,
+                    bins=level['recurrence_bins']
                 )
                 if recurrence_data:
                     traces = [recurrence_data]
@@ -407,6 +464,7 @@ class ECGGraphView(APIView):
                 layout = {'title': 'Unknown viewer type'}
 
             print(f"Generated {len(traces)} traces")
+            GRAPH_COSTS.record(stage, units, render_clock.elapsed_ms())
 
             response_data = {
                 'traces': traces,
@@ -415,29 +473,34 @@ class ECGGraphView(APIView):
                 'success': True, 'prediction_label': pred,
                 'prediction_confidence': conf,
                 'prediction_status': status_text,
-                'new_fs': int(fs)
+                'new_fs': int(fs),
+                'quality': quality_report(level, budget_ms, clock),
             }
 
-            return Response(response_data)
+            return response_data, 200
 
         except Exception as e:
             import traceback
             print("=== ERROR in ECGGraphView ===")
             print(traceback.format_exc())
-            return Response({
+            return {
                 'error': str(e),
                 'success': False
-            }, status=400)
+            }, 400
 class ECGPredictView(APIView):
     """Endpoint for getting predictions on processed/undersampled ECG data"""
     def post(self, request):
+        data, code = self.predict(request.data)
+        return Response(data, status=code)
+
+    def predict(self, payload):
         try:
             print("=== ECG Prediction Request ===")
-            data = request.data.get('data')
-            fs = request.data.get('fs')
+            data = payload.get('data')
+            fs = payload.get('fs')
             
             if data is None or fs is None:
-                return Response({'error': 'Missing data or fs parameter'}, status=400)
+                return {'error': 'Missing data or fs parameter'}, 400
             
             # Convert to numpy array
             data = np.array(data)
@@ -449,33 +512,37 @@ class ECGPredictView(APIView):
             
             print(f"✅ ECG Prediction result: {pred} ({conf:.2%})")
             
-            return Response({
+            return {
                 'prediction': pred,
                 'confidence': float(conf),
                 'status': status_text,
                 'fs': int(fs),
                 'success': True
-            })
+            }, 200
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            return Response({
+            return {
                 'error': str(e),
                 'success': False
-            }, status=400)
+            }, 400
         
 
 class EEGPredictView(APIView):
     """Endpoint for getting predictions on processed/undersampled EEG data"""
     def post(self, request):
+        data, code = self.predict(request.data)
+        return Response(data, status=code)
+
+    def predict(self, payload):
         try:
             print("=== EEG Prediction Request ===")
-            data = request.data.get('data')
-            fs = request.data.get('fs')
+            data = payload.get('data')
+            fs = payload.get('fs')
             
             if data is None or fs is None:
-                return Response({'error': 'Missing data or fs parameter'}, status=400)
+                return {'error': 'Missing data or fs parameter'}, 400
             
             # Convert to numpy array
             data = np.array(data)
@@ -487,18 +554,18 @@ class EEGPredictView(APIView):
             
             print(f"✅ EEG Prediction result: {pred} ({conf:.2%})")
             
-            return Response({
+            return {
                 'prediction': pred,
                 'confidence': float(conf),
                 'status': status_text,
                 'fs': int(fs),
                 'success': True
-            })
+            }, 200
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            return Response({
+            return {
                 'error': str(e),
                 'success': False
-            }, status=400)
\ No newline at end of file
+            }, 400
\ No newline at end of file
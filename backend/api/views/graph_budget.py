@@ -0,0 +1,108 @@
+import threading
+import time
+
+# Cheapest last. Cycle detection runs on the decimated signal, so its resolution
+# drops with the same factor as the traces.
+GRAPH_QUALITY_LEVELS = (
+    {'quality': 'full', 'decimate': 1, 'recurrence_bins': 50, 'predict': True},
+    {'quality': 'high', 'decimate': 2, 'recurrence_bins': 40, 'predict': True},
+    {'quality': 'medium', 'decimate': 4, 'recurrence_bins': 32, 'predict': False},
+    {'quality': 'low', 'decimate': 8, 'recurrence_bins': 20, 'predict': False},
+)
+COST_SMOOTHING = 0.2 # Weight of the newest measurement in each moving average
+COST_HALF_LIFE = 5.0 # Seconds for an estimate that is no longer measured to halve
+
+class StageCosts:
+    # Exponential moving average of milliseconds per unit of work, per stage.
+    # A stage with no measurement yet is assumed free, so its first frame runs at
+    # full quality and supplies the measurement. An estimate decays while its stage
+    # goes unmeasured: a stage skipped for being too slow (prediction after a
+    # warm-up outlier, say) is eventually tried and measured again.
+    def __init__(self, smoothing=COST_SMOOTHING, half_life=COST_HALF_LIFE):
+        self.smoothing = smoothing
+        self.half_life = half_life
+        self._costs = {} # stage -> (ms per unit, time measured)
+        self._lock = threading.Lock()
+
+    def _current(self, stage, now):
+        cost, measured = self._costs.get(stage, (0.0, now))
+        return cost * 0.5 ** ((now - measured) / self.half_life)
+
+    def estimate(self, stage, units=1):
+        return self._current(stage, time.monotonic()) * units
+
+    def record(self, stage, units, elapsed_ms):
+        per_unit = elapsed_ms / max(units, 1)
+        now = time.monotonic()
+        with self._lock:
+            if stage in self._costs:
+                per_unit = (1 - self.smoothing) * self._current(stage, now) + self.smoothing * per_unit
+            self._costs[stage] = (per_unit, now)
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {stage: self._current(stage, now) for stage in self._costs}
+
+GRAPH_COSTS = StageCosts()
+
+def render_stage(viewer_type, polar_mode, is_ecg):
+    if viewer_type == 'polar' and is_ecg and polar_mode == 'cycles':
+        return 'polar-cycles'
+    if viewer_type == 'polar' and polar_mode != 'fixed':
+        return 'polar-cumulative'
+    return viewer_type
+
+def render_units(viewer_type, polar_mode, fs, position, zoom, chunk_duration, n_channels, level):
+    # Samples the generator touches at this level; recurrence adds its histogram cells.
+    if viewer_type == 'xor':
+        seconds = 2 * chunk_duration
+    elif viewer_type == 'polar' and polar_mode not in ('fixed', 'cycles'):
+        seconds = position + zoom
+    else:
+        seconds = zoom
+    samples = seconds * fs / level['decimate']
+    if viewer_type == 'recurrence':
+        return samples + level['recurrence_bins'] ** 2
+    return samples * max(1, n_channels)
+
+def choose_quality(budget_ms, spent_ms, predict_stage, stage, units_for):
+    # Highest level whose predicted cost fits what is left of the budget.
+    for level in GRAPH_QUALITY_LEVELS:
+        estimate = GRAPH_COSTS.estimate(stage, units_for(level))
+        if level['predict']:
+            estimate += GRAPH_COSTS.estimate(predict_stage)
+        if spent_ms + estimate <= budget_ms:
+            return level, estimate
+    return GRAPH_QUALITY_LEVELS[-1], estimate
+
+def plan_graph_quality(budget_ms, clock, kind, viewer_type, polar_mode, fs, position, zoom,
+                       chunk_duration, channels, is_ecg):
+    # Returns (level, render stage, render units); no budget means full quality.
+    stage = render_stage(viewer_type, polar_mode, is_ecg)
+
+    def units_for(level):
+        return render_units(viewer_type, polar_mode, fs, position, zoom, chunk_duration, len(channels), level)
+
+    if budget_ms is None:
+        level = GRAPH_QUALITY_LEVELS[0]
+    else:
+        level, _ = choose_quality(budget_ms, clock.elapsed_ms(), f'predict-{kind}', stage, units_for)
+    return level, stage, units_for(level)
+
+def quality_report(level, budget_ms, clock):
+    return {
+        'level': level['quality'],
+        'decimate': level['decimate'],
+        'recurrence_bins': level['recurrence_bins'],
+        'prediction': level['predict'],
+        'budget_ms': budget_ms,
+        'elapsed_ms': round(clock.elapsed_ms(), 1),
+    }
+
+class Stopwatch:
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def elapsed_ms(self):
+        return 1000 * (time.perf_counter() - self.start)
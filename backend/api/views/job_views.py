@@ -0,0 +1,142 @@
+import os
+import shutil
+import uuid
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.response import Response
+from rest_framework import status
+
+from ..jobs import JOB_HANDLERS, job_handler, job_input_path, submit_job, cancel_job, job_summary
+from ..models import Job
+from .audio import store_audio, ensure_audio_file
+from .audio_decode import decode_path
+
+# Handlers import their view modules lazily, so registering a kind loads no model.
+
+def _job_audio_url(payload, audio_id):
+    # Written to disk so whichever process serves the poll can also serve the file.
+    ensure_audio_file(audio_id)
+    return urljoin(payload['base_url'], reverse('audio-file', args=[audio_id]))
+
+@job_handler('correct_aliasing')
+def run_correct_aliasing(job):
+    from .correction_aliasing import MAX_CORRECTION_WORKERS
+    from .correction_model import fix_aliasing_array, SEGMENT_SECONDS
+
+    params = job.payload['params']
+    workers = min(MAX_CORRECTION_WORKERS, max(1, int(params.get('workers', 1))))
+    segment_seconds = max(1.0, float(params.get('segment_seconds', SEGMENT_SECONDS)))
+    decoded = decode_path(job.payload['input_path'])
+
+    def on_progress(done, total):
+        job.progress(done / total, {'segments_done': done, 'segments': total}, force=done == total)
+
+    corrected, corrected_sr = fix_aliasing_array(
+        decoded['samples'], decoded['sr'], workers=workers, segment_seconds=segment_seconds,
+        on_progress=on_progress,
+    )
+    corrected_id = store_audio(corrected, corrected_sr)
+    return {
+        'corrected_audio': _job_audio_url(job.payload, corrected_id),
+        'corrected_id': corrected_id,
+        'sr': corrected_sr,
+    }
+
+@job_handler('drone_timeline')
+def run_drone_timeline(job):
+    from .drone_views import model, feature_extractor
+    from .drone_timeline import (
+        scan_drone_timeline,
+        TIMELINE_WINDOW_SECONDS,
+        TIMELINE_HOP_SECONDS,
+        TIMELINE_BATCH_SIZE,
+        DRONE_THRESHOLD,
+    )
+
+    if model is None or feature_extractor is None:
+        raise RuntimeError('Model not loaded')
+    params = job.payload['params']
+    decoded = decode_path(job.payload['input_path'], sr=16000)
+    y, sr = decoded['samples'], decoded['sr']
+
+    # Same content-addressed name as the synchronous view, so waveform chunks work on the result.
+    file_id = f"{decoded['digest']}{os.path.splitext(job.payload['input_path'])[1]}"
+    saved = os.path.join(settings.TEMP_FILE_ROOT, file_id)
+    if not os.path.exists(saved):
+        shutil.copyfile(job.payload['input_path'], saved)
+
+    result = scan_drone_timeline(
+        model, feature_extractor, y, sr,
+        window_seconds=float(params.get('window_seconds', TIMELINE_WINDOW_SECONDS)),
+        hop_seconds=float(params.get('hop_seconds', TIMELINE_HOP_SECONDS)),
+        threshold=float(params.get('threshold', DRONE_THRESHOLD)),
+        batch_size=max(1, int(params.get('batch_size', TIMELINE_BATCH_SIZE))),
+        on_progress=job.progress,
+    )
+    return {
+        'file_id': file_id,
+        'original_rate': int(decoded['original_sr']),
+        'duration': len(y) / sr,
+        **result,
+    }
+
+@job_handler('sar')
+def run_sar(job):
+    from .sar_views import analyse_sar_image, SAR_STAGES
+
+    with open(job.payload['input_path'], 'rb') as f:
+        data = f.read()
+
+    def on_progress(done, total):
+        next_stage = SAR_STAGES[done] if done < total else None
+        job.progress(done / total, {'stage': next_stage, 'stages_done': done, 'stages': total}, force=True)
+
+    image_uri, features = analyse_sar_image(data, on_progress=on_progress)
+    return {'image_uri': image_uri, 'features': features}
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def submit_job_view(request, kind):
+    if kind not in JOB_HANDLERS:
+        return Response({'error': f'Unknown job kind: {kind}'}, status=status.HTTP_404_NOT_FOUND)
+    upload = next(iter(request.FILES.values()), None)
+    if upload is None:
+        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    input_path = job_input_path(uuid.uuid4().hex, os.path.splitext(upload.name)[1])
+    with open(input_path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+
+    params = {key: value for key, value in request.data.items() if key not in request.FILES}
+    try:
+        job = submit_job(kind, {
+            'input_path': input_path,
+            'filename': upload.name,
+            'params': params,
+            'base_url': request.build_absolute_uri('/'),
+        })
+    except Exception as e:
+        os.remove(input_path)
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'job_id': str(job.id),
+        'status': job.status,
+        'poll_url': request.build_absolute_uri(reverse('job-detail', args=[job.id])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET', 'DELETE'])
+def job_detail(request, job_id):
+    if request.method == 'DELETE':
+        job = cancel_job(job_id)
+    else:
+        job = Job.objects.filter(pk=job_id).exclude(expires_at__lt=timezone.now()).first()
+    if job is None:
+        return Response({'error': 'Job not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_summary(job))
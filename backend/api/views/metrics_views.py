@@ -0,0 +1,16 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+import os
+
+from ..preload import process_memory
+from ..scheduling import scheduler_metrics
+
+@api_view(['GET'])
+def scheduler_metrics_view(request):
+    return Response(scheduler_metrics())
+
+@api_view(['GET'])
+def memory_metrics_view(request):
+    # Under preload-and-fork, model pages show up as shared_kb in both entries.
+    return Response({'worker': process_memory(), 'parent': process_memory(os.getppid())})
@@ -0,0 +1,116 @@
+import numpy as np
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .stft_engine import centered_segment, count_frames
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+PITCH_FRAME_LENGTH = 2048
+PITCH_HOP_LENGTH = PITCH_FRAME_LENGTH // 4
+PITCH_BLOCK_FRAMES = 512
+PITCH_CACHE = OrderedDict()
+PITCH_CACHE_SIZE = 64
+
+_cache_lock = threading.Lock()
+
+def _pitch_range():
+    return librosa.note_to_hz('C2'), librosa.note_to_hz('C7')
+
+def _yin_block(samples, sr, f0, f1, fmin, fmax):
+    segment = centered_segment(samples, f0, f1, PITCH_FRAME_LENGTH, PITCH_HOP_LENGTH)
+    return librosa.yin(
+        segment,
+        fmin=fmin,
+        fmax=fmax,
+        sr=sr,
+        frame_length=PITCH_FRAME_LENGTH,
+        hop_length=PITCH_HOP_LENGTH,
+        center=False
+    )
+
+def iter_pitch_blocks(samples, sr, block_frames=PITCH_BLOCK_FRAMES, workers=None):
+    samples = np.asarray(samples, dtype=np.float32)
+    n_frames = count_frames(len(samples), PITCH_HOP_LENGTH)
+    fmin, fmax = _pitch_range()
+    workers = workers or os.cpu_count() or 1
+
+    bounds = [(f0, min(n_frames, f0 + block_frames)) for f0 in range(0, n_frames, block_frames)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for f0, f1 in bounds:
+            pending.append((f0, executor.submit(_yin_block, samples, sr, f0, f1, fmin, fmax)))
+            if len(pending) >= 2 * workers:
+                start, future = pending.popleft()
+                yield start, future.result()
+        while pending:
+            start, future = pending.popleft()
+            yield start, future.result()
+
+def _cache_key(file_id, samples, sr):
+    return (file_id, len(samples), int(sr))
+
+def get_cached_pitch(file_id, samples, sr):
+    if file_id is None:
+        return None
+    key = _cache_key(file_id, samples, sr)
+    with _cache_lock:
+        f0 = PITCH_CACHE.get(key)
+        if f0 is not None:
+            PITCH_CACHE.move_to_end(key)
+        return f0
+
+def cache_pitch(file_id, samples, sr, f0):
+    if file_id is None:
+        return
+    with _cache_lock:
+        PITCH_CACHE[_cache_key(file_id, samples, sr)] = f0
+        if len(PITCH_CACHE) > PITCH_CACHE_SIZE:
+            PITCH_CACHE.popitem(last=False)
+
+def clear_pitch(file_id):
+    with _cache_lock:
+        for key in [k for k in PITCH_CACHE if k[0] == file_id]:
+            del PITCH_CACHE[key]
+
+def track_pitch(samples, sr, file_id=None, workers=None):
+    cached = get_cached_pitch(file_id, samples, sr)
+    if cached is not None:
+        return cached
+
+    f0 = np.empty(count_frames(len(samples), PITCH_HOP_LENGTH), dtype=np.float64)
+    for start, block in iter_pitch_blocks(samples, sr, workers=workers):
+        f0[start:start + len(block)] = block
+    cache_pitch(file_id, samples, sr, f0)
+    return f0
+
+def pitch_points(f0, start, sr, step):
+    # Keep the frames that land on the global stride so streamed blocks
+    # line up with the one-shot result.
+    first = (-start) % step
+    indices = np.arange(first, len(f0), step)
+    times = librosa.frames_to_time(start + indices, sr=sr, hop_length=PITCH_HOP_LENGTH)
+    values = f0[indices]
+    return times.tolist(), np.where(np.isnan(values), None, values).tolist()
+
+def iter_frequency_over_time(samples, sr, max_points=2000, file_id=None, workers=None):
+    n_frames = count_frames(len(samples), PITCH_HOP_LENGTH)
+    step = max(1, n_frames // max_points)
+
+    cached = get_cached_pitch(file_id, samples, sr)
+    if cached is not None:
+        times, frequency = pitch_points(cached, 0, sr, step)
+        yield {'time': times, 'frequency': frequency, 'progress': 1.0}
+        return
+
+    f0 = np.empty(n_frames, dtype=np.float64)
+    for start, block in iter_pitch_blocks(samples, sr, workers=workers):
+        f0[start:start + len(block)] = block
+        times, frequency = pitch_points(block, start, sr, step)
+        yield {'time': times, 'frequency': frequency, 'progress': (start + len(block)) / n_frames}
+    cache_pitch(file_id, samples, sr, f0)
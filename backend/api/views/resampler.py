@@ -0,0 +1,104 @@
+import math
+import numpy as np
+from functools import lru_cache
+from scipy.signal import firwin, resample_poly
+
+RESAMPLER_PRESETS = {
+    'linear': {'taps': 2, 'phases': 0},
+    'fast': {'taps': 8, 'phases': 64},
+    'balanced': {'taps': 16, 'phases': 256},
+    'high': {'taps': 32, 'phases': 1024},
+}
+DEFAULT_QUALITY = 'balanced'
+DEFAULT_BLOCK_SIZE = 16384
+KAISER_BETA = 8.6
+POLY_HALF_LEN = 10
+POLY_KAISER_BETA = 5.0
+
+@lru_cache(maxsize=32)
+def sinc_kernel_table(taps, phases, cutoff):
+    # Row p holds the taps for a read position p / phases of a sample past
+    # the integer index; the extra last row covers a fraction of exactly 1.
+    offsets = np.arange(-(taps // 2) + 1, taps // 2 + 1)
+    frac = np.arange(phases + 1) / phases
+    x = offsets[np.newaxis, :] - frac[:, np.newaxis]
+    ratio = np.clip(x / (taps / 2), -1.0, 1.0)
+    window = np.i0(KAISER_BETA * np.sqrt(1.0 - ratio ** 2)) / np.i0(KAISER_BETA)
+    kernel = cutoff * np.sinc(cutoff * x) * window
+    kernel /= kernel.sum(axis=1, keepdims=True)
+    return offsets, kernel.astype(np.float32)
+
+def _padded_segment(audio, lo, hi, wrap=False):
+    if wrap:
+        start = lo % len(audio)
+        if start + (hi - lo) <= len(audio):
+            return audio[start:start + hi - lo]
+        return np.take(audio, np.arange(lo, hi), mode='wrap')
+    segment = np.zeros(hi - lo, dtype=np.float32)
+    src_lo, src_hi = max(0, lo), min(len(audio), hi)
+    if src_hi > src_lo:
+        segment[src_lo - lo:src_hi - lo] = audio[src_lo:src_hi]
+    return segment
+
+def resample_block(audio, positions, quality=DEFAULT_QUALITY, cutoff=1.0, wrap=False):
+    preset = RESAMPLER_PRESETS[quality]
+    base = np.floor(positions).astype(np.int64)
+    frac = (positions - base).astype(np.float32)
+
+    if preset['phases'] == 0:
+        segment = _padded_segment(audio, int(base[0]), int(base[-1]) + 2, wrap)
+        local = base - base[0]
+        return segment[local] * (1.0 - frac) + segment[local + 1] * frac
+
+    offsets, table = sinc_kernel_table(preset['taps'], preset['phases'], round(float(cutoff), 2))
+    lo = int(base[0]) + int(offsets[0])
+    hi = int(base[-1]) + int(offsets[-1]) + 1
+    segment = _padded_segment(audio, lo, hi, wrap)
+    taps = np.lib.stride_tricks.sliding_window_view(segment, len(offsets))[base - base[0]]
+    weights = table[np.rint(frac * preset['phases']).astype(np.int64)]
+    return np.einsum('ij,ij->i', taps, weights)
+
+def resample_positions(audio, position_blocks, n_out, quality=DEFAULT_QUALITY, cutoff=1.0):
+    audio = np.asarray(audio, dtype=np.float32)
+    out = np.empty(n_out, dtype=np.float32)
+    for start, positions in position_blocks:
+        out[start:start + len(positions)] = resample_block(audio, positions, quality, cutoff)
+    return out
+
+def doppler_position_blocks(n_samples, v_start, v_end, speed_of_sound, eps, block_size=DEFAULT_BLOCK_SIZE):
+    # Read positions follow the normalised cumulative Doppler factor. The total
+    # is taken in a first blockwise pass so no full-length temporaries are needed.
+    def factors(start, stop):
+        ramp = np.arange(start, stop, dtype=np.float64) / max(1, n_samples - 1)
+        v = v_start + (v_end - v_start) * ramp
+        return speed_of_sound / (speed_of_sound - v + eps)
+
+    block_sums = [factors(s, min(n_samples, s + block_size)).sum() for s in range(0, n_samples, block_size)]
+    first = factors(0, 1)[0]
+    span = sum(block_sums) - first
+
+    running = 0.0
+    for block_index, start in enumerate(range(0, n_samples, block_size)):
+        stop = min(n_samples, start + block_size)
+        if span == 0:
+            yield start, np.arange(start, stop, dtype=np.float64)
+            continue
+        indices = running + np.cumsum(factors(start, stop))
+        running += block_sums[block_index]
+        yield start, (indices - first) / span * (n_samples - 1)
+
+@lru_cache(maxsize=64)
+def polyphase_filter(up, down):
+    # The same low-pass resample_poly designs on every call; cached so a sweep
+    # of rates, or the same rate requested again, designs each filter once.
+    max_rate = max(up, down)
+    taps = firwin(2 * POLY_HALF_LEN * max_rate + 1, 1.0 / max_rate, window=('kaiser', POLY_KAISER_BETA))
+    return taps.astype(np.float32)
+
+def resample_to_rate(samples, rate, new_rate):
+    samples = np.asarray(samples, dtype=np.float32)
+    g = math.gcd(int(rate), int(new_rate))
+    up, down = int(new_rate) // g, int(rate) // g
+    if up == down:
+        return samples.copy()
+    return resample_poly(samples, up, down, window=polyphase_filter(up, down)).astype(np.float32)
@@ -54,9 +54,17 @@ def _extract_features(band):
 
 def _parse_tif_from_data_uri(contents):
     content_type, content_string = contents.split(",")
-    decoded = base64.b64decode(content_string)
+    return analyse_sar_image(base64.b64decode(content_string))
 
-    with rasterio.MemoryFile(decoded) as memfile:
+
+SAR_STAGES = ('read', 'stretch', 'features', 'render')
+
+def analyse_sar_image(data, on_progress=None):
+    def stage_done(done):
+        if on_progress is not None:
+            on_progress(done, len(SAR_STAGES))
+
+    with rasterio.MemoryFile(data) as memfile:
         with memfile.open() as src:
             bands = src.count
             if bands >= 3:
@@ -64,10 +72,13 @@ def _parse_tif_from_data_uri(contents):
                 display_band = np.mean(img, axis=2)
             else:
                 display_band = src.read(1)
+            stage_done(1)
 
             display_band = np.nan_to_num(display_band)
             stretched = _stretch_image(display_band)
+            stage_done(2)
             features = _extract_features(stretched)
+            stage_done(3)
 
             # Plot
             fig, ax = plt.subplots(figsize=(8, 8))
@@ -80,6 +91,7 @@ def _parse_tif_from_data_uri(contents):
             plt.close(fig)
             buf.seek(0)
             encoded = base64.b64encode(buf.read()).decode("utf-8")
+            stage_done(4)
 
     return f"data:image/png;base64,{encoded}", features
 
@@ -91,15 +103,13 @@ def upload_sar(request):
         # Accept multipart file 'image' or JSON data URI 'contents'
         if 'image' in request.FILES:
             image_file = request.FILES['image']
-            data = image_file.read()
-            src = "data:application/octet-stream;base64," + base64.b64encode(data).decode('ascii')
+            image_uri, features = analyse_sar_image(image_file.read())
         else:
             contents = request.data.get('contents')
             if not contents:
                 return Response({'error': 'No image provided'}, status=status.HTTP_400_BAD_REQUEST)
-            src = contents
+            image_uri, features = _parse_tif_from_data_uri(contents)
 
-        image_uri, features = _parse_tif_from_data_uri(src)
         return Response({'image_uri': image_uri, 'features': features})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 
+from .doppler_scene import MAX_SCENE_SECONDS, MAX_SCENE_SOURCES, MAX_SCENE_SR, MIN_SCENE_SR, DEFAULT_SCENE_SR
+from .resampler import RESAMPLER_PRESETS, DEFAULT_QUALITY
+
 class SignalUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
     signal_type = serializers.CharField(max_length=10)
@@ -21,4 +24,11 @@ class SignalGraphSerializer(serializers.Serializer):
     polar_mode = serializers.CharField(required=False)
     rec_ch_x = serializers.IntegerField(required=False)
     rec_ch_y = serializers.IntegerField(required=False)
-    undersample_freq = serializers.IntegerField(required=False, allow_null=True, default=None)  # NEW: Nyquist undersampling
\ No newline at end of file
+    undersample_freq = serializers.IntegerField(required=False, allow_null=True, default=None)  # NEW: Nyquist undersampling
+    budget_ms = serializers.FloatField(required=False, allow_null=True, default=None, min_value=1)  # Latency budget per frame
+
+class DopplerSceneSerializer(serializers.Serializer):
+    duration = serializers.FloatField(default=10.0, min_value=0.01, max_value=MAX_SCENE_SECONDS)
+    sr = serializers.IntegerField(default=DEFAULT_SCENE_SR, min_value=MIN_SCENE_SR, max_value=MAX_SCENE_SR)  # Bounds the mix buffer
+    quality = serializers.ChoiceField(choices=list(RESAMPLER_PRESETS), default=DEFAULT_QUALITY)
+    sources = serializers.ListField(child=serializers.DictField(), min_length=1, max_length=MAX_SCENE_SOURCES)
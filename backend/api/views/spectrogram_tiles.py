@@ -0,0 +1,245 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from django.conf import settings
+import numpy as np
+import json
+import os
+import shutil
+import tempfile
+
+from ..frames import SingleFlight
+from .audio import get_or_load_audio
+from .stft_engine import stream_spectrogram, pool_max, DB_FLOOR
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+TILE_FRAMES = 256
+MIN_FREQ_BINS = 64
+PYRAMID_N_FFT = 2048
+PYRAMID_HOP_LENGTH = 512
+
+PYRAMID_FLIGHTS = SingleFlight() # Concurrent requests for one file share its build
+
+def _pyramid_dir(file_id):
+    safe_id = os.path.basename(str(file_id))
+    if not safe_id or safe_id != file_id:
+        raise ValueError('Invalid file_id')
+    return os.path.join(settings.SPECTROGRAM_CACHE_ROOT, safe_id)
+
+def _copy_level(source, path, freq_pool):
+    n_freqs = -(-source.shape[0] // freq_pool)
+    n_frames = -(-source.shape[1] // 2)
+    target = np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=(n_freqs, n_frames))
+    chunk = 2 * TILE_FRAMES
+    for c0 in range(0, source.shape[1], chunk):
+        block = np.asarray(source[:, c0:c0 + chunk], dtype=np.float32)
+        block = pool_max(pool_max(block, 2, axis=1, fill=DB_FLOOR), freq_pool, axis=0, fill=DB_FLOOR)
+        target[:, c0 // 2:c0 // 2 + block.shape[1]] = block
+    target.flush()
+    return target
+
+def build_spectrogram_pyramid(file_id, samples, sr, n_fft=PYRAMID_N_FFT, hop_length=PYRAMID_HOP_LENGTH, fmax=None):
+    if not librosa:
+        return None
+
+    target_dir = _pyramid_dir(file_id)
+    work_dir = tempfile.mkdtemp(dir=settings.SPECTROGRAM_CACHE_ROOT)
+    levels = []
+    time_factor, freq_factor = 1, 1
+
+    try:
+        raw_path = os.path.join(work_dir, 'raw.npy')
+        raw, freqs = stream_spectrogram(
+            samples, sr, n_fft=n_fft, hop_length=hop_length, use_mel=False,
+            fmax=fmax or sr / 2, out_path=raw_path
+        )
+        level_data = np.lib.format.open_memmap(
+            os.path.join(work_dir, 'level_0.npy'), mode='w+', dtype=np.float16, shape=raw.shape
+        )
+        for c0 in range(0, raw.shape[1], TILE_FRAMES):
+            level_data[:, c0:c0 + TILE_FRAMES] = raw[:, c0:c0 + TILE_FRAMES]
+        level_data.flush()
+        del raw
+        os.remove(raw_path)
+
+        while True:
+            levels.append({
+                'time_factor': time_factor,
+                'freq_factor': freq_factor,
+                'n_frames': int(level_data.shape[1]),
+                'n_freqs': int(level_data.shape[0]),
+            })
+            if level_data.shape[1] <= TILE_FRAMES:
+                break
+
+            freq_pool = 2 if level_data.shape[0] > MIN_FREQ_BINS else 1
+            level_data = _copy_level(level_data, os.path.join(work_dir, f'level_{len(levels)}.npy'), freq_pool)
+            time_factor *= 2
+            freq_factor *= freq_pool
+        del level_data
+
+        meta = {
+            'sr': int(sr),
+            'n_fft': int(n_fft),
+            'hop_length': int(hop_length),
+            'duration': len(samples) / sr,
+            'freqs': freqs.tolist(),
+            'tile_frames': TILE_FRAMES,
+            'levels': levels,
+        }
+        with open(os.path.join(work_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        _publish_pyramid(work_dir, target_dir)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    return load_spectrogram_pyramid(file_id) or meta
+
+def _publish_pyramid(work_dir, target_dir):
+    # Another worker process may publish the same pyramid first. Its copy is
+    # complete once meta.json exists, so that counts as success; anything else
+    # left at the target is an interrupted build and is replaced.
+    for _ in range(2):
+        try:
+            os.replace(work_dir, target_dir)
+            return
+        except OSError:
+            if os.path.exists(os.path.join(target_dir, 'meta.json')):
+                shutil.rmtree(work_dir, ignore_errors=True)
+                return
+            shutil.rmtree(target_dir, ignore_errors=True)
+    os.replace(work_dir, target_dir)
+
+def load_spectrogram_pyramid(file_id):
+    meta_path = os.path.join(_pyramid_dir(file_id), 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+def spectrogram_pyramid_exists(file_id):
+    try:
+        return bool(file_id) and os.path.exists(os.path.join(_pyramid_dir(file_id), 'meta.json'))
+    except ValueError:
+        return False
+
+def get_spectrogram_pyramid(file_id):
+    meta = load_spectrogram_pyramid(file_id)
+    if meta is not None:
+        return meta
+
+    def build():
+        meta = load_spectrogram_pyramid(file_id)
+        if meta is not None:
+            return meta
+        stored = get_or_load_audio(file_id)
+        if stored is None:
+            return None
+        return build_spectrogram_pyramid(file_id, stored['samples'], stored['sr'])
+
+    return PYRAMID_FLIGHTS.do(file_id, build)
+
+def clear_spectrogram_pyramid(file_id):
+    shutil.rmtree(_pyramid_dir(file_id), ignore_errors=True)
+
+def _level_axes(meta, level_index):
+    level = meta['levels'][level_index]
+    frame_seconds = meta['hop_length'] * level['time_factor'] / meta['sr']
+    freqs = np.asarray(meta['freqs'])[::level['freq_factor']][:level['n_freqs']]
+    return level, frame_seconds, freqs
+
+def read_spectrogram_tile(file_id, meta, level_index, tile_index):
+    level, frame_seconds, freqs = _level_axes(meta, level_index)
+    start = tile_index * meta['tile_frames']
+    end = min(level['n_frames'], start + meta['tile_frames'])
+    if start >= end:
+        return None
+
+    data = np.load(os.path.join(_pyramid_dir(file_id), f'level_{level_index}.npy'), mmap_mode='r')
+    return {
+        'level': level_index,
+        'tile': tile_index,
+        'z': data[:, start:end].astype(np.float32).tolist(),
+        'x': (np.arange(start, end) * frame_seconds).tolist(),
+        'y': freqs.tolist(),
+    }
+
+def read_spectrogram_range(file_id, meta, t_start, t_end, max_time_points):
+    levels = meta['levels']
+    level_index = len(levels) - 1
+    for i in range(len(levels)):
+        _, frame_seconds, _ = _level_axes(meta, i)
+        if (t_end - t_start) / frame_seconds <= max_time_points:
+            level_index = i
+            break
+
+    level, frame_seconds, freqs = _level_axes(meta, level_index)
+    start = max(0, int(t_start / frame_seconds))
+    end = min(level['n_frames'], int(np.ceil(t_end / frame_seconds)) + 1)
+    if start >= end:
+        return {'level': level_index, 'tiles': [], 'z': [], 'x': [], 'y': freqs.tolist()}
+
+    tile_frames = meta['tile_frames']
+    first_tile, last_tile = start // tile_frames, (end - 1) // tile_frames
+    tile_start = first_tile * tile_frames
+    tile_end = min(level['n_frames'], (last_tile + 1) * tile_frames)
+
+    data = np.load(os.path.join(_pyramid_dir(file_id), f'level_{level_index}.npy'), mmap_mode='r')
+    return {
+        'level': level_index,
+        'tiles': list(range(first_tile, last_tile + 1)),
+        'z': data[:, tile_start:tile_end].astype(np.float32).tolist(),
+        'x': (np.arange(tile_start, tile_end) * frame_seconds).tolist(),
+        'y': freqs.tolist(),
+    }
+
+@api_view(['GET'])
+def spectrogram_tiles(request):
+    try:
+        file_id = request.query_params.get('file_id')
+        if not file_id:
+            return Response({'error': 'No file_id provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if not librosa:
+            return Response({'error': 'librosa is required for spectrograms'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        meta = get_spectrogram_pyramid(file_id)
+        if meta is None:
+            return Response({'error': 'File not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+
+        info = {
+            'file_id': file_id,
+            'duration': meta['duration'],
+            'tile_frames': meta['tile_frames'],
+            'levels': len(meta['levels']),
+        }
+
+        level = request.query_params.get('level')
+        tile = request.query_params.get('tile')
+        if level is not None and tile is not None:
+            level, tile = int(level), int(tile)
+            if not 0 <= level < len(meta['levels']) or tile < 0:
+                return Response({'error': 'Tile out of range'}, status=status.HTTP_400_BAD_REQUEST)
+            tile_data = read_spectrogram_tile(file_id, meta, level, tile)
+            if tile_data is None:
+                return Response({'error': 'Tile out of range'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({**info, **tile_data})
+
+        t_start = float(request.query_params.get('start', 0.0))
+        t_end = float(request.query_params.get('end', meta['duration']))
+        max_time_points = max(1, int(request.query_params.get('max_time_points', 700)))
+        if t_end <= t_start:
+            return Response({'error': 'end must be greater than start'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({**info, **read_spectrogram_range(file_id, meta, t_start, t_end, max_time_points)})
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,105 @@
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+from scipy import fft as sp_fft
+from scipy.signal import get_window
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+DEFAULT_BLOCK_FRAMES = 1024
+DB_FLOOR = -80.0
+POWER_AMIN = 1e-10
+AMPLITUDE_AMIN = 1e-5
+
+def pool_max(values, factor, axis, fill):
+    if factor <= 1:
+        return values
+    values = np.moveaxis(values, axis, -1)
+    n = values.shape[-1]
+    padded_n = -(-n // factor) * factor
+    if padded_n != n:
+        pad = [(0, 0)] * (values.ndim - 1) + [(0, padded_n - n)]
+        values = np.pad(values, pad, mode='constant', constant_values=fill)
+    pooled = values.reshape(values.shape[:-1] + (padded_n // factor, factor)).max(axis=-1)
+    return np.moveaxis(pooled, -1, axis)
+
+def count_frames(n_samples, hop_length):
+    return 1 + n_samples // hop_length
+
+def spectrogram_axes(sr, n_fft, use_mel=True, n_mels=128, fmax=8000):
+    if use_mel:
+        basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmax=fmax).astype(np.float32)
+        return librosa.mel_frequencies(n_mels=n_mels, fmax=fmax), basis
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    return freqs[freqs <= fmax], None
+
+def centered_segment(samples, f0, f1, frame_length, hop_length):
+    # Frames are centred like librosa's center=True, pad_mode='constant',
+    # so each block reads frame_length - hop_length samples of overlap from its neighbours.
+    start = f0 * hop_length - frame_length // 2
+    stop = (f1 - 1) * hop_length - frame_length // 2 + frame_length
+    segment = np.zeros(stop - start, dtype=np.float32)
+    src_start, src_stop = max(0, start), min(len(samples), stop)
+    if src_stop > src_start:
+        segment[src_start - start:src_stop - start] = samples[src_start:src_stop]
+    return segment
+
+def frame_block(samples, f0, f1, n_fft, hop_length):
+    segment = centered_segment(samples, f0, f1, n_fft, hop_length)
+    return np.lib.stride_tricks.sliding_window_view(segment, n_fft)[::hop_length]
+
+def stream_spectrogram(samples, sr, n_fft=2048, hop_length=512, use_mel=True, n_mels=128, fmax=8000,
+                       time_pool=1, out_path=None, block_frames=DEFAULT_BLOCK_FRAMES, workers=None):
+    if not librosa:
+        return None, None
+
+    samples = np.asarray(samples, dtype=np.float32)
+    n_frames = count_frames(len(samples), hop_length)
+    freqs, mel_basis = spectrogram_axes(sr, n_fft, use_mel, n_mels, fmax)
+    n_bins = len(freqs)
+    window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+
+    time_pool = max(1, int(time_pool))
+    block_frames = -(-max(block_frames, time_pool) // time_pool) * time_pool
+    shape = (n_bins, -(-n_frames // time_pool))
+    if out_path:
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=shape)
+    else:
+        out = np.empty(shape, dtype=np.float32)
+
+    def process(block_index):
+        f0 = block_index * block_frames
+        f1 = min(n_frames, f0 + block_frames)
+        frames = frame_block(samples, f0, f1, n_fft, hop_length)
+        magnitude = np.abs(sp_fft.rfft(frames * window, axis=1))
+        if mel_basis is not None:
+            values = mel_basis @ (magnitude ** 2).T
+        else:
+            values = magnitude[:, :n_bins].T
+        values = pool_max(values, time_pool, axis=1, fill=0.0)
+        out[:, f0 // time_pool:f0 // time_pool + values.shape[1]] = values
+        return float(values.max()) if values.size else 0.0
+
+    n_blocks = -(-n_frames // block_frames)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        ref = max(executor.map(process, range(n_blocks)), default=0.0)
+
+    if mel_basis is not None:
+        scale, amin = 10.0, POWER_AMIN
+    else:
+        scale, amin = 20.0, AMPLITUDE_AMIN
+    ref_db = scale * np.log10(max(ref, amin))
+    for c0 in range(0, shape[1], block_frames):
+        block = out[:, c0:c0 + block_frames]
+        np.maximum(block, amin, out=block)
+        np.log10(block, out=block)
+        block *= scale
+        block -= ref_db
+        np.clip(block, DB_FLOOR, 0, out=block)
+
+    if out_path:
+        out.flush()
+    return out, freqs
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +52,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.frames.StaleFrameMiddleware',
+    'api.scheduling.PrioritySchedulingMiddleware',
 ]
 
 # CORS settings
@@ -60,6 +64,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Graph playback tags frames so the server can drop ones the client has moved past
+CORS_ALLOW_HEADERS = (*default_headers, 'x-session-id', 'x-frame-seq')
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -101,6 +108,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Job workers write progress from several threads; WAL lets polls read meanwhile
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': 'PRAGMA journal_mode=WAL;',
+        },
     }
 }
 
@@ -151,4 +163,63 @@ import os
 
 # Define a directory for temporary file uploads
 TEMP_FILE_ROOT = os.path.join(BASE_DIR, 'tmp', 'uploads')
-os.makedirs(TEMP_FILE_ROOT, exist_ok=True)
\ No newline at end of file
+os.makedirs(TEMP_FILE_ROOT, exist_ok=True)
+
+# Directory for cached spectrogram tile pyramids, keyed by file_id
+SPECTROGRAM_CACHE_ROOT = os.path.join(BASE_DIR, 'tmp', 'spectrograms')
+os.makedirs(SPECTROGRAM_CACHE_ROOT, exist_ok=True)
+
+# Rendered and stored audio written out as WAV for ranged playback, keyed by audio id
+AUDIO_FILE_ROOT = os.path.join(BASE_DIR, 'tmp', 'audio')
+os.makedirs(AUDIO_FILE_ROOT, exist_ok=True)
+
+# Background jobs: worker threads per process, and how long finished jobs are kept
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_RETENTION_SECONDS = 3600
+JOB_INPUT_ROOT = os.path.join(BASE_DIR, 'tmp', 'jobs')
+os.makedirs(JOB_INPUT_ROOT, exist_ok=True)
+
+# Request threads per server worker (gunicorn.conf.py reads the same variable).
+SERVER_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Request classes for api.scheduling: slots per class, and how many requests may queue.
+# Batch requests are shed with 503 + Retry-After once their queue is full or they wait
+# past queue_timeout; interactive requests always wait for a slot. A queued request
+# holds its thread, so running plus queued batch requests are held to half the
+# threads, leaving the rest for interactive frames.
+BATCH_CONCURRENCY = 2
+REQUEST_CLASS_LIMITS = {
+    'interactive': {'concurrency': 8, 'queue_depth': 64},
+    'batch': {
+        'concurrency': BATCH_CONCURRENCY,
+        'queue_depth': max(1, SERVER_THREADS // 2 - BATCH_CONCURRENCY),
+        'queue_timeout': 10.0,
+        'shed': True,
+        'retry_after': 5,
+    },
+}
+
+# ASGI mode (e.g. `uvicorn backend.asgi:application`): serve the ECG/EEG graph and
+# predict endpoints from async views that hand parsing, rendering and inference to
+# OFFLOAD_WORKERS processes (0 runs them on threads instead).
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+OFFLOAD_WORKERS = int(os.environ.get('OFFLOAD_WORKERS', 0))
+OFFLOAD_WORKER_THREADS = int(os.environ.get('OFFLOAD_WORKER_THREADS', 1))
+OFFLOAD_WARM_MODULES = ['api.views.ecg_views']
+
+# Shared signal store (api.signal_store): memory-mapped arrays every worker can read.
+# /dev/shm keeps it in RAM; elsewhere it falls back to a directory on disk.
+SIGNAL_STORE_ROOT = os.environ.get(
+    'SIGNAL_STORE_ROOT',
+    '/dev/shm/signal-viewer' if os.path.isdir('/dev/shm') else os.path.join(BASE_DIR, 'tmp', 'signals'),
+)
+SIGNAL_STORE_MAX_BYTES = int(os.environ.get('SIGNAL_STORE_MAX_BYTES', 2 * 1024 ** 3))
+
+# Preload-and-fork (api.preload, used by gunicorn.conf.py): modules whose models the
+# server master loads once before forking, so all workers share one copy.
+PRELOAD_MODULES = [
+    'api.utils',
+    'api.views.drone_views',
+    'api.views.correction_model',
+    'api.views.ecg_views',
+]
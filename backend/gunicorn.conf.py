@@ -0,0 +1,30 @@
+import os
+
+# Preload-and-fork deployment: `gunicorn -c gunicorn.conf.py` from this directory.
+# The master loads the models once (api.preload) and forks the workers, so model
+# memory stays at one copy however many workers run.
+
+wsgi_app = 'backend.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) # Sizes the batch queue too (settings.SERVER_THREADS)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+preload_app = True
+
+# Offload workers are spawned, so each would load its own copy of the models; the
+# forked workers already run requests in separate processes.
+if os.environ.get('OFFLOAD_WORKERS', '0') != '0':
+    print('OFFLOAD_WORKERS is ignored under preload-and-fork')
+os.environ['OFFLOAD_WORKERS'] = '0'
+
+def on_starting(server):
+    # The application is already imported (preload_app); load the models before
+    # the first worker is forked.
+    from api.preload import preload_models
+    preload_models()
+
+def post_fork(server, worker):
+    # Thread pools the master deferred (api.preload.run_after_fork) start here,
+    # once per worker.
+    from api.preload import after_fork
+    after_fork()
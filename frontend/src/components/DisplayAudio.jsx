@@ -3,11 +3,17 @@ import Plot from "react-plotly.js";
 import { apiService } from "../services/api";
 import "./Audio.css";
 
+const PREFETCH_FRAMES = 20;
+const PREFETCH_LOW_WATER = 5;
+
+const emptyBuffer = () => ({ frames: [], position: 0, done: false, pending: false });
+
 function DisplayAudio({ analysis, audioSrc, setError, zoomRange, onZoomChange }) {
   const [isPlaying, setIsPlaying] = useState(false);
   const [position, setPosition] = useState(0);
   const [waveform, setWaveform] = useState(null);
   const intervalRef = useRef(null);
+  const bufferRef = useRef(emptyBuffer());
 
   // Initialize waveform when analysis changes
   useEffect(() => {
@@ -17,48 +23,82 @@ function DisplayAudio({ analysis, audioSrc, setError, zoomRange, onZoomChange })
       setWaveform(analysis.initial_waveform);
       setPosition(0);
       setIsPlaying(false);
+      bufferRef.current = emptyBuffer();
     }
   }, [analysis]);
 
-  // Handle chunk streaming when playing
+  // Handle chunk streaming when playing. Frames are prefetched in batches
+  // and played back from a local buffer, one frame per tick.
   useEffect(() => {
     if (isPlaying && analysis?.file_id) {
       intervalRef.current = setInterval(async () => {
+        const buffer = bufferRef.current;
+
+        if (buffer.frames.length > 0) {
+          const frame = buffer.frames.shift();
+          setWaveform(frame);
+        } else if (buffer.done) {
+          setIsPlaying(false);
+          setPosition(0);
+          // Reset to initial waveform
+          setWaveform(analysis.initial_waveform);
+          return;
+        }
+
+        if (buffer.frames.length > PREFETCH_LOW_WATER || buffer.done || buffer.pending) {
+          return;
+        }
+
+        buffer.pending = true;
         try {
           // Use unified endpoint for both drone and doppler
-          const response = await apiService.getWaveformChunk(
+          const response = await apiService.getWaveformFrames(
             analysis.file_id,
-            position
+            buffer.position,
+            PREFETCH_FRAMES
           );
 
+          if (bufferRef.current !== buffer) {
+            return;
+          }
+
           if (response.data.completed) {
-            setIsPlaying(false);
-            setPosition(0);
-            // Reset to initial waveform
-            setWaveform(analysis.initial_waveform);
+            buffer.done = true;
           } else {
-            // Update waveform with new chunk data
-            setWaveform({
-              time: response.data.time,
-              amplitude: response.data.amplitude,
+            const { amplitude, frame_offsets, frame_length, start_time, sr } = response.data;
+            frame_offsets.forEach((offset) => {
+              const frameAmplitude = amplitude.slice(offset, offset + frame_length);
+              const frameStart = start_time + offset / sr;
+              const step = frameAmplitude.length > 1
+                ? frameAmplitude.length / sr / (frameAmplitude.length - 1)
+                : 0;
+              buffer.frames.push({
+                time: frameAmplitude.map((_, i) => frameStart + i * step),
+                amplitude: frameAmplitude,
+              });
             });
+            buffer.position = response.data.new_position;
+            buffer.done = response.data.is_last;
             setPosition(response.data.new_position);
           }
         } catch (err) {
           console.error("Failed to update waveform:", err);
           setError("Failed to update waveform.");
           setIsPlaying(false);
+        } finally {
+          buffer.pending = false;
         }
       }, 100);
     } else {
       clearInterval(intervalRef.current);
     }
     return () => clearInterval(intervalRef.current);
-  }, [isPlaying, position, analysis, setError]);
+  }, [isPlaying, analysis, setError]);
 
   const handleStartPause = () => {
     if (!isPlaying) {
       setPosition(0); // Reset position when starting
+      bufferRef.current = emptyBuffer();
     }
     setIsPlaying(!isPlaying);
   };
@@ -67,6 +107,7 @@ function DisplayAudio({ analysis, audioSrc, setError, zoomRange, onZoomChange })
     setIsPlaying(false);
     setPosition(0);
     setWaveform(analysis?.initial_waveform);
+    bufferRef.current = emptyBuffer();
   };
 
   return (
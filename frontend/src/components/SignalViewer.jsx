@@ -3,6 +3,9 @@ import Plot from "react-plotly.js";
 import { apiService } from "../services/api";
 import "./SignalViewer.css";
 
+// Playback advances every 100 ms; leave room for the network round trip
+const PLAYBACK_BUDGET_MS = 70;
+
 export default function SignalViewer({ isECG = false }) {
   const [signalData, setSignalData] = useState(null);
   const [channels, setChannels] = useState([0, 1, 2, 3]);
@@ -30,6 +33,11 @@ export default function SignalViewer({ isECG = false }) {
   const [displayedFs, setDisplayedFs] = useState(null);
   const fileInputRef = useRef(null);
 
+  // Graph frames carry a session id and increasing seq so stale ones can be dropped
+  const sessionId = useRef(crypto.randomUUID());
+  const frameSeq = useRef(0);
+  const drawnSeq = useRef(0);
+
   const maxChannels = isECG ? 12 : 8;
   const leadNames = isECG
     ? ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
@@ -247,6 +255,8 @@ export default function SignalViewer({ isECG = false }) {
       return;
     }
 
+    const seq = ++frameSeq.current;
+
     const updateGraph = async () => {
       try {
         const response = await graphAPI(
@@ -261,9 +271,16 @@ export default function SignalViewer({ isECG = false }) {
           polarMode,
           recChX,
           recChY,
-          undersampleFreq
+          undersampleFreq,
+          { sessionId: sessionId.current, seq },
+          // While playing, keep the frame rate and let the server trade resolution
+          playing ? PLAYBACK_BUDGET_MS : undefined
         );
 
+        // Responses can land out of order; never draw over a newer frame.
+        if (seq < drawnSeq.current) return;
+        drawnSeq.current = seq;
+
         if (response.data && response.data.traces) {
           setGraphData(response.data.traces);
           setCurrentTime(response.data.current_time);
@@ -277,6 +294,9 @@ export default function SignalViewer({ isECG = false }) {
           setError("Invalid graph data received");
         }
       } catch (error) {
+        // 409: the server skipped this frame because a newer one replaced it.
+        if (error.response?.status === 409 && error.response.data?.stale) return;
+        if (seq < drawnSeq.current) return;
         console.error("Error updating graph:", error);
         setError(
           "Error updating graph: " +
@@ -299,6 +319,7 @@ export default function SignalViewer({ isECG = false }) {
     recChX,
     recChY,
     undersampleFreq,
+    playing,
   ]);
 
   // Playback interval
@@ -5,8 +5,25 @@ import DisplayAudio from "../../components/DisplayAudio";
 import AudioUploader from "../../components/AudioUploader";
 import "./Doppler.css";
 
+const SIMULATE_FIELDS = [
+  "file_id",
+  "src",
+  "frequencies",
+  "initial_waveform",
+  "spectrogram",
+];
+const GENERATE_FIELDS = [
+  "file_id",
+  "src",
+  "status",
+  "observed",
+  "initial_waveform",
+  "spectrogram",
+];
+
 const Doppler = () => {
   const [uploadSrc, setUploadSrc] = useState(null);
+  const [assetId, setAssetId] = useState(null);
   const [storeOriginal, setStoreOriginal] = useState(null);
   const [waveformOriginal, setWaveformOriginal] = useState(null);
 
@@ -126,10 +143,12 @@ const Doppler = () => {
     reader.onload = async () => {
       const contents = reader.result;
       setUploadSrc(contents);
+      setAssetId(null);
 
       try {
         setLoading(true);
         const { data } = await apiService.dopplerUpload(contents);
+        setAssetId(data.asset_id);
         setStoreOriginal(data.store);
         setWaveformOriginal(data.waveform);
 
@@ -163,14 +182,15 @@ const Doppler = () => {
   }, []);
 
   const onSimulate = async () => {
-    if (!uploadSrc) return;
+    if (!assetId) return;
     try {
       setLoading(true);
       const { data } = await apiService.dopplerSimulate({
-        dataUri: uploadSrc,
+        assetId,
         vStart,
         vEnd,
         fSource,
+        fields: SIMULATE_FIELDS,
       });
       setPassingSrc(data.src);
       setPassingWaveform(data.waveform);
@@ -216,14 +236,15 @@ const Doppler = () => {
   };
 
   const onGenerate = async () => {
-    if (!uploadSrc) return;
+    if (!assetId) return;
     try {
       setLoading(true);
       const { data } = await apiService.dopplerGenerate({
-        dataUri: uploadSrc,
+        assetId,
         vStart,
         vEnd,
         fSource,
+        fields: GENERATE_FIELDS,
       });
 
       setDopplerSrc(data.src);
@@ -277,11 +298,11 @@ const Doppler = () => {
   };
 
   const onPredict = async () => {
-    if (!uploadSrc) return;
+    if (!assetId) return;
     try {
       setLoading(true);
       setPredError("");
-      const { data } = await apiService.dopplerPredict(uploadSrc);
+      const { data } = await apiService.dopplerPredict(assetId);
       setPrediction(data);
     } catch (e) {
       console.error(e);
@@ -513,7 +534,7 @@ const Doppler = () => {
                 <button
                   className="btn "
                   onClick={onGenerate}
-                  disabled={!uploadSrc || loading}
+                  disabled={!assetId || loading}
                 >
                   Apply Doppler (full length)
                 </button>
@@ -529,7 +550,7 @@ const Doppler = () => {
               <button
                 className="btn"
                 onClick={onSimulate}
-                disabled={!uploadSrc || loading}
+                disabled={!assetId || loading}
               >
                 Simulate Car Passing By
               </button>
@@ -557,7 +578,7 @@ const Doppler = () => {
               flexWrap: "wrap",
             }}
           >
-            <button onClick={onPredict} disabled={!uploadSrc || loading}>
+            <button onClick={onPredict} disabled={!assetId || loading}>
               Predict Speed & Frequency from Uploaded File
             </button>
             <div>
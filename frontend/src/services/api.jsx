@@ -6,6 +6,9 @@ const apiClient = axios.create({
   baseURL: "http://localhost:8000/api",
 });
 
+const frameHeaders = (frame) =>
+  frame ? { "X-Session-Id": frame.sessionId, "X-Frame-Seq": frame.seq } : {};
+
 export const apiService = {
   detectAudio: (audioFile) => {
     const formData = new FormData();
@@ -22,6 +25,14 @@ export const apiService = {
     });
   },
 
+  getWaveformFrames: (fileId, position, frames) => {
+    return apiClient.post("/audio/waveform-chunk/", {
+      file_id: fileId,
+      position,
+      frames,
+    });
+  },
+
   resampleAudio: (fileId, newSr) => {
     return apiClient.post("/audio/resample/", {
       file_id: fileId,
@@ -33,24 +44,28 @@ export const apiService = {
   dopplerUpload: (dataUri) => {
     return apiClient.post("/doppler/upload/", { contents: dataUri });
   },
-  dopplerGenerate: ({ dataUri, vStart, vEnd, fSource }) => {
+  // Generate/simulate/predict take the asset_id returned by dopplerUpload,
+  // so slider changes only send parameters.
+  dopplerGenerate: ({ assetId, vStart, vEnd, fSource, fields }) => {
     return apiClient.post("/doppler/generate/", {
-      contents: dataUri,
+      asset_id: assetId,
       v_start: vStart,
       v_end: vEnd,
       f_source: fSource,
+      fields,
     });
   },
-  dopplerSimulate: ({ dataUri, vStart, vEnd, fSource }) => {
+  dopplerSimulate: ({ assetId, vStart, vEnd, fSource, fields }) => {
     return apiClient.post("/doppler/simulate/", {
-      contents: dataUri,
+      asset_id: assetId,
       v_start: vStart,
       v_end: vEnd,
       f_source: fSource,
+      fields,
     });
   },
-  dopplerPredict: (dataUri) => {
-    return apiClient.post("/doppler/predict/", { contents: dataUri });
+  dopplerPredict: (assetId) => {
+    return apiClient.post("/doppler/predict/", { asset_id: assetId });
   },
 
   getDopplerWaveformChunk: (fileId, position) => {
@@ -124,7 +139,9 @@ export const apiService = {
     polarMode,
     recChX,
     recChY,
-    undersampleFreq // NEW parameter
+    undersampleFreq, // NEW parameter
+    frame, // optional { sessionId, seq }: lets the server drop frames a newer one replaced
+    budgetMs // optional: server lowers resolution to answer within this many ms
   ) =>
     apiClient.post("/eeg/graph/", {
       data,
@@ -139,7 +156,8 @@ export const apiService = {
       rec_ch_x: recChX,
       rec_ch_y: recChY,
       undersample_freq: undersampleFreq, // NEW
-    }),
+      budget_ms: budgetMs,
+    }, { headers: frameHeaders(frame) }),
 
   // ECG endpoints
   ecgDemo: () => apiClient.post("/ecg/demo/"),
@@ -173,7 +191,9 @@ export const apiService = {
     polarMode,
     recChX,
     recChY,
-    undersampleFreq // NEW parameter
+    undersampleFreq, // NEW parameter
+    frame, // optional { sessionId, seq }: lets the server drop frames a newer one replaced
+    budgetMs // optional: server lowers resolution to answer within this many ms
   ) =>
     apiClient.post("/ecg/graph/", {
       data,
@@ -188,7 +208,8 @@ export const apiService = {
       rec_ch_x: recChX,
       rec_ch_y: recChY,
       undersample_freq: undersampleFreq, // NEW
-    }),
+      budget_ms: budgetMs,
+    }, { headers: frameHeaders(frame) }),
     predictEegWithData: async (data, fs) => {
     try {
       const response = await axios.post('/api/eeg/predict/', {